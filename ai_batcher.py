@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from typing import Optional
+
+from log_setup import STEP_LOGGER_NAME
+
+logger = logging.getLogger("TelegramDealBot")
+step_log = logging.getLogger(STEP_LOGGER_NAME)
+
+
+class AIBatcher:
+    """Kısa bir pencere içinde gelen metin analizlerini tek Gemini isteğinde toplar.
+
+    analyze_batch, [{'id', 'text', 'link'}] listesini alıp her eleman için
+    'id' alanı olan sonuç listesi döndüren async fonksiyondur. Sonucu
+    gelmeyen veya istek hatası alan her eleman için submit() None döner;
+    çağıran taraf o mesaj için tekli analize düşer.
+    """
+
+    def __init__(self, analyze_batch, window_seconds: float = 0.3, max_batch: int = 8):
+        self.analyze_batch = analyze_batch
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._pending = []  # (id, text, link, future)
+        self._timer = None
+        self._tasks = set()
+        self._next_id = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.fallbacks = 0
+
+    async def submit(self, text: str, link: str = "") -> Optional[dict]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._next_id += 1
+        self._pending.append((str(self._next_id), text, link, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list):
+        results = {}
+        # Tek eleman için toplu prompt'a gerek yok, doğrudan tekli analize düşsün
+        if len(batch) > 1:
+            try:
+                response = await self.analyze_batch(
+                    [{'id': item_id, 'text': text, 'link': link} for item_id, text, link, _ in batch]
+                )
+                results = {str(r.get('id')): r for r in response or [] if isinstance(r, dict)}
+                self.batches += 1
+                step_log.info("🤖 Toplu AI analizi: %d mesaj tek istekte, %d sonuç döndü", len(batch), len(results))
+            except Exception as e:
+                logger.warning(f"⚠️ Toplu AI analizi başarısız, mesajlar tek tek analiz edilecek: {e}")
+        for item_id, _, _, future in batch:
+            result = results.get(item_id)
+            if result is None:
+                self.fallbacks += 1
+            else:
+                self.batched_items += 1
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            'batches': self.batches,
+            'batched_items': self.batched_items,
+            'fallbacks': self.fallbacks,
+        }
+
+    async def close(self):
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# Ayrıştırma sıcak yollarının çevrimdışı mikro benchmark'ı: fiyat ayrıştırma, mesajdan
+# fiyat çıkarma, sayfa verisi çıkarma (BeautifulSoup ve akış parser'ı) ve Amazon
+# seçicileri korpus/ altındaki mesaj ve sayfalarla ölçülür. Ağa çıkılmaz.
+#
+# corpus/pages/*.html gerçek sayfaların kaydı değil, elle hazırlanmış örneklerdir: her
+# mağazanın meta/JSON-LD/DOM yapısı taklit edilip gerçek sayfa boyutuna yaklaşmak için
+# dolgu script'leri ve ürün kartları eklenmiştir. Süreler gerçek sayfalarda farklı olabilir.
+#
+# Her fonksiyon için ops/sn, p50/p99 gecikme ve tracemalloc ile tepe bellek raporlanır;
+# sonuçlar baseline.json ile karşılaştırılır.
+#
+# Kullanım: python benchmarks/bench_parsing.py [--rounds 20] [--only extract_html_data]
+#           [--save-baseline] [--max-regression 0.25]
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from html_meta import StreamingMetaExtractor, extract_html_data  # noqa: E402
+from price_extractor import extract_price, parse_price  # noqa: E402
+from structured_data import ProductRecord, apply_amazon_selectors  # noqa: E402
+
+CORPUS_DIR = os.path.join(BENCH_DIR, 'corpus')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+
+def _load_json(name):
+    with open(os.path.join(CORPUS_DIR, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_pages():
+    pages = []
+    for item in _load_json('pages.json'):
+        with open(os.path.join(CORPUS_DIR, 'pages', item['file']), encoding='utf-8') as f:
+            pages.append(dict(item, html=f.read()))
+    return pages
+
+
+def _stream_extract(html, url):
+    extractor = StreamingMetaExtractor(parse_price)
+    # Ağdan 16 KB'lık parçalar halinde geliyormuş gibi besle
+    for start in range(0, len(html), 16384):
+        if extractor.feed(html[start:start + 16384]):
+            break
+    return extractor.result(url)
+
+
+def build_cases():
+    """{ad: (çağrılacak fonksiyonların listesi, doğrulama fonksiyonu)}"""
+    price_strings = _load_json('price_strings.json')
+    messages = _load_json('price_messages.json')
+    pages = load_pages()
+    amazon_soups = [
+        (BeautifulSoup(p['html'], 'html.parser'), p) for p in pages if 'amazon.' in p['url']
+    ]
+
+    def check_prices(items, func):
+        return sum(abs(func(item['text']) - item['price']) < 0.01 for item in items), len(items)
+
+    def check_pages():
+        correct = 0
+        for page in pages:
+            data = extract_html_data(page['html'], page['url'], parse_price)
+            correct += all(
+                data[k] == v if not isinstance(v, float) else abs(data[k] - v) < 0.01
+                for k, v in page['expected'].items()
+            )
+        return correct, len(pages)
+
+    def check_stream():
+        # Akış parser'ı product:price meta etiketini de okur ama Amazon DOM seçicilerini
+        # çalıştırmaz; farklı beklenen alanlar pages.json'da expected_stream ile verilir
+        correct = 0
+        for page in pages:
+            data = _stream_extract(page['html'], page['url'])
+            expected = dict(page['expected'], **page.get('expected_stream', {}))
+            correct += all(
+                data[k] == v if not isinstance(v, float) else abs(data[k] - v) < 0.01
+                for k, v in expected.items()
+            )
+        return correct, len(pages)
+
+    def check_amazon():
+        correct = 0
+        for soup, page in amazon_soups:
+            record = apply_amazon_selectors(ProductRecord(), soup, parse_price)
+            correct += (abs(record.price - page['expected']['price']) < 0.01
+                        and abs(record.original_price - page['expected']['original_price']) < 0.01)
+        return correct, len(amazon_soups)
+
+    return {
+        '_parse_price': (
+            [lambda t=item['text']: parse_price(t) for item in price_strings],
+            lambda: check_prices(price_strings, parse_price),
+        ),
+        '_extract_price_from_text': (
+            [lambda t=item['text']: extract_price(t) for item in messages],
+            lambda: check_prices(messages, extract_price),
+        ),
+        'extract_html_data': (
+            [lambda p=page: extract_html_data(p['html'], p['url'], parse_price) for page in pages],
+            check_pages,
+        ),
+        'stream_meta_extract': (
+            [lambda p=page: _stream_extract(p['html'], p['url']) for page in pages],
+            check_stream,
+        ),
+        'apply_amazon_selectors': (
+            [lambda s=soup: apply_amazon_selectors(ProductRecord(), s, parse_price) for soup, _ in amazon_soups],
+            check_amazon,
+        ),
+    }
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(calls, rounds, warmup=2):
+    for _ in range(warmup):
+        for call in calls:
+            call()
+    timings = []
+    for _ in range(rounds):
+        for call in calls:
+            started = time.perf_counter_ns()
+            call()
+            timings.append(time.perf_counter_ns() - started)
+    timings.sort()
+    # Bellek ölçümü ayrı turda: tracemalloc açıkken süreler yavaşlar
+    tracemalloc.start()
+    for call in calls:
+        call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'ops_per_sec': round(len(timings) / (sum(timings) / 1e9), 1),
+        'p50_us': round(_percentile(timings, 0.50) / 1000, 1),
+        'p99_us': round(_percentile(timings, 0.99) / 1000, 1),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=20, help='Korpusun kaç tur çalıştırılacağı')
+    parser.add_argument('--only', action='append', help='Sadece verilen fonksiyon(lar)ı ölç')
+    parser.add_argument('--save-baseline', action='store_true', help='Sonuçları baseline.json olarak kaydet')
+    parser.add_argument('--max-regression', type=float, default=None,
+                        help='ops/sn baseline\'a göre bu orandan fazla düşerse çıkış kodu 1 (örn. 0.25)')
+    args = parser.parse_args()
+
+    # Ölçülen fonksiyonların logları süreleri bozmasın
+    logging.getLogger("TelegramDealBot").setLevel(logging.CRITICAL)
+
+    baseline = load_baseline()
+    results = {}
+    regressions = []
+    print(f"{'fonksiyon':<26}{'doğruluk':>10}{'ops/sn':>12}{'p50 µs':>10}{'p99 µs':>10}{'bellek KB':>11}{'baseline':>10}")
+    for name, (calls, check) in build_cases().items():
+        if args.only and name not in args.only:
+            continue
+        if not calls:
+            print(f"{name:<26} (korpusta örnek yok)")
+            continue
+        result = measure(calls, args.rounds)
+        results[name] = result
+        accuracy = '-'
+        if check is not None:
+            correct, total = check()
+            accuracy = f"{correct}/{total}"
+        delta = ''
+        if name in baseline:
+            change = result['ops_per_sec'] / baseline[name]['ops_per_sec'] - 1
+            delta = f"{change:+.0%}"
+            if args.max_regression is not None and change < -args.max_regression:
+                regressions.append((name, change))
+        print(f"{name:<26}{accuracy:>10}{result['ops_per_sec']:>12,.0f}{result['p50_us']:>10}"
+              f"{result['p99_us']:>10}{result['peak_kb']:>11}{delta:>10}")
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"\n💾 Baseline kaydedildi: {BASELINE_PATH}")
+    if regressions:
+        for name, change in regressions:
+            print(f"❌ {name}: ops/sn baseline'a göre {change:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
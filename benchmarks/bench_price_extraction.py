@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# Fiyat çıkarma motoru benchmark'ı: yeni tek geçişli motor ile eski
+# _extract_price_from_text'i aynı mesaj korpusunda hız ve doğruluk olarak karşılaştırır.
+#
+# Kullanım: python benchmarks/bench_price_extraction.py [--repeat 200]
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_extractor import extract_price  # noqa: E402
+from legacy import legacy_extract_price_from_text  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus', 'price_messages.json')
+
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def accuracy(func, corpus):
+    correct = 0
+    misses = []
+    for item in corpus:
+        found = func(item['text'])
+        if abs(found - item['price']) < 0.01:
+            correct += 1
+        else:
+            misses.append((item['text'], item['price'], found))
+    return correct, misses
+
+
+def speed(func, corpus, repeat):
+    texts = [item['text'] for item in corpus]
+
+    def run():
+        for text in texts:
+            func(text)
+
+    # En iyi tekrar süresi (gürültüden en az etkilenen)
+    best = min(timeit.repeat(run, number=1, repeat=repeat))
+    return len(texts) / best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--verbose', action='store_true', help='Yanlış bulunan mesajları listele')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    print(f"📚 Korpus: {len(corpus)} mesaj\n")
+    results = {}
+    for name, func in (('eski', legacy_extract_price_from_text), ('yeni', extract_price)):
+        correct, misses = accuracy(func, corpus)
+        ops = speed(func, corpus, args.repeat)
+        results[name] = ops
+        print(f"{name:<5} doğruluk: {correct}/{len(corpus)} ({correct / len(corpus):.0%})  hız: {ops:,.0f} mesaj/sn")
+        if args.verbose:
+            for text, expected, found in misses:
+                print(f"      ❌ beklenen {expected:<10} bulunan {found:<10} | {text[:50]!r}")
+    print(f"\n⚡ Hız oranı (yeni/eski): {results['yeni'] / results['eski']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+import re
+
+# Bot'un eski (tek modüle taşınmadan önceki) fiyat fonksiyonları.
+# Sadece benchmark'ta yeni motorla hız/doğruluk karşılaştırması için tutulur.
+
+
+def legacy_parse_price(price_str: str) -> float:
+    if not price_str: return 0.0
+    try:
+        price_str = price_str.split('TL')[0].split('₺')[0].split('lira')[0].strip()
+        price_str = re.sub(r'[^\d,\.]', '', price_str)
+        if ',' in price_str and '.' in price_str:
+            if price_str.find('.') < price_str.find(','):
+                price_str = price_str.replace('.', '').replace(',', '.')
+            else:
+                price_str = price_str.replace(',', '')
+        elif ',' in price_str:
+            parts = price_str.split(',')
+            if len(parts[-1]) <= 2:
+                price_str = price_str.replace(',', '.')
+            else:
+                price_str = price_str.replace(',', '')
+        return float(price_str)
+    except:
+        return 0.0
+
+
+def legacy_extract_price_from_text(text: str) -> float:
+    if not text:
+        return 0.0
+    patterns = [
+        r'(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s*(?:TL|₺|lira|fiyat|Fiyat)',
+        r'(?:TL|₺|lira|fiyat|Fiyat):?\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
+        r'₺\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
+        r'(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s*TL',
+        r'(\d+(?:,\d{2})?)\s*(?:TL|₺)',
+        r'fiyat[:\s]+(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
+        r'(\d{1,3}(?:\.\d{3})*)\s*(?:TL|₺)',
+        r'(\d+)\s*(?:TL|₺)',
+    ]
+    for pattern in patterns:
+        matches = re.findall(pattern, text, re.IGNORECASE)
+        if matches:
+            parsed = legacy_parse_price(matches[0])
+            if parsed > 0:
+                return parsed
+    return 0.0
@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+logger = logging.getLogger("TelegramDealBot")
+
+# Cache anahtarını etkilememesi gereken takip parametreleri
+_TRACKING_PARAMS = {'fbclid', 'gclid', 'yclid', 'mc_cid', 'mc_eid', 'igshid', 'si'}
+
+
+def normalize_url(url: str) -> str:
+    """Aynı sayfayı gösteren linkleri tek anahtara indir (host küçük harf, www yok, takip parametreleri yok)"""
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return url.strip()
+    host = (parsed.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parsed.port and parsed.port not in (80, 443):
+        host = f"{host}:{parsed.port}"
+    query = [
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_') and k.lower() not in _TRACKING_PARAMS
+    ]
+    query.sort()
+    path = parsed.path.rstrip('/') or '/'
+    return urlunparse(('https', host, path, '', urlencode(query), ''))
+
+
+class TwoTierCache:
+    """Bellek (LRU) + SQLite diskte kalıcı, TTL'li anahtar/değer cache'i.
+
+    Değerler JSON olarak saklanır. Bellek katmanı max_memory_items ile, disk
+    katmanı max_disk_items ile sınırlıdır; taşan kayıtlar en eski erişime göre
+    silinir.
+    """
+
+    def __init__(self, path: str, table: str = 'cache', ttl_seconds: float = 86400,
+                 max_memory_items: int = 2000, max_disk_items: int = 50000):
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._writes_since_prune = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        try:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._db = sqlite3.connect(path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed_at)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            # Disk katmanı açılamazsa sadece bellek cache'i ile devam et
+            logger.warning(f"⚠️ Cache veritabanı açılamadı ({path}), sadece bellek kullanılacak: {e}")
+            self._db = None
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+            del self._memory[key]
+
+        if self._db is not None:
+            try:
+                row = self._db.execute(
+                    f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    value = json.loads(row[0])
+                    self._db.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember(key, row[1], value)
+                    self.disk_hits += 1
+                    return value
+            except (sqlite3.Error, ValueError) as e:
+                logger.debug(f"Cache okuma hatası: {e}")
+
+        self.misses += 1
+        return None
+
+    def peek(self, key: str) -> Optional[dict]:
+        """Sayaçları etkilemeden bellekteki geçerli kaydı döndür"""
+        entry = self._memory.get(key)
+        if entry is not None and entry[0] > time.time():
+            return entry[1]
+        return None
+
+    def set(self, key: str, value: dict):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        self._remember(key, expires_at, value)
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now),
+            )
+            self._db.commit()
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= 100:
+                self._prune(now)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.debug(f"Cache yazma hatası: {e}")
+
+    def _remember(self, key: str, expires_at: float, value: dict):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _prune(self, now: float):
+        """Süresi dolanları ve boyut sınırını aşan en eski kayıtları sil"""
+        self._writes_since_prune = 0
+        self._db.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_items,),
+        )
+        self._db.commit()
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round(hits / total, 3) if total else 0.0,
+            'memory_items': len(self._memory),
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,138 @@
+import re
+from typing import Optional, Tuple
+
+# Kural tabanlı kategori sınıflandırıcı. Kelimeler AI prompt'undaki kategori
+# açıklamalarından ve uygulamadaki category_detection_service.dart tablolarından
+# seçildi; sadece tek bir kategoriye işaret eden, önek olarak güvenle eşleşen
+# kelimeler tutuldu ("kulaklık" -> "kulaklığı", "kulaklıklar").
+CATEGORY_KEYWORDS = {
+    'elektronik': [
+        'telefon', 'iphone', 'samsung galaxy', 'xiaomi', 'redmi', 'kulaklık', 'kulaklik', 'airpods',
+        'powerbank', 'power bank', 'şarj aleti', 'sarj aleti', 'şarj kablosu', 'laptop', 'notebook',
+        'macbook', 'bilgisayar', 'tablet', 'ipad', 'monitör', 'monitor', 'klavye', 'mouse', 'ssd',
+        'harici disk', 'usb bellek', 'hafıza kartı', 'televizyon', 'smart tv', 'soundbar',
+        'hoparlör', 'hoparlor', 'projeksiyon', 'fotoğraf makinesi', 'drone', 'akıllı saat',
+        'smartwatch', 'ekran kartı', 'işlemci', 'modem', 'router', 'buzdolabı', 'buzdolabi',
+        'çamaşır makinesi', 'camasir makinesi', 'bulaşık makinesi', 'bulasik makinesi',
+        'süpürge', 'supurge', 'airfryer', 'air fryer', 'kahve makinesi', 'mikrodalga', 'klima',
+    ],
+    'moda': [
+        'elbise', 'tişört', 'tisort', 't-shirt', 'gömlek', 'gomlek', 'pantolon', 'jean', 'etek',
+        'ceket', 'kaban', 'kazak', 'sweatshirt', 'hoodie', 'hırka', 'ayakkabı', 'ayakkabi',
+        'sneaker', 'çizme', 'terlik', 'sandalet', 'çanta', 'canta', 'cüzdan', 'cuzdan', 'kol saati',
+        'güneş gözlüğü', 'kolye', 'küpe', 'bileklik', 'şapka', 'iç çamaşırı', 'çorap', 'corap',
+        'pijama', 'sütyen',
+    ],
+    'ev_yasam': [
+        'mobilya', 'kanepe', 'koltuk takımı', 'yemek masası', 'sandalye', 'gardırop', 'komodin',
+        'kitaplık', 'nevresim', 'yorgan', 'yastık', 'battaniye', 'perde', 'havlu', 'bornoz',
+        'tencere', 'tava seti', 'bıçak seti', 'saklama kabı', 'termos', 'çaydanlık', 'caydanlik',
+        'yemek takımı', 'lamba', 'avize', 'aydınlatma', 'dekorasyon', 'ayna', 'paspas',
+    ],
+    'anne_bebek': [
+        'bebek', 'bebek bezi', 'biberon', 'emzik', 'puset', 'mama sandalyesi', 'oyuncak',
+        'prima', 'molfix', 'sleepy', 'chicco',
+    ],
+    'kozmetik': [
+        'parfüm', 'parfum', 'makyaj', 'ruj', 'fondöten', 'maskara', 'şampuan', 'sampuan',
+        'saç kremi', 'cilt bakım', 'nemlendirici', 'güneş kremi', 'deodorant', 'tıraş', 'tiras',
+        'epilatör', 'saç kurutma', 'saç düzleştirici', 'diş macunu', 'nivea', "l'oreal", 'loreal',
+    ],
+    'spor_outdoor': [
+        'koşu bandı', 'koşu ayakkabı', 'fitness', 'dambıl', 'dambil', 'yoga mat', 'pilates',
+        'kamp sandalye', 'çadır', 'cadir', 'uyku tulumu', 'bisiklet', 'scooter', 'eşofman', 'esofman', 'outdoor', 'trekking',
+        'protein tozu', 'spor ayakkabı', 'spor ayakkabi',
+    ],
+    'supermarket': [
+        'deterjan', 'yumuşatıcı', 'yumusatici', 'çamaşır suyu', 'tuvalet kağıdı', 'tuvalet kagidi',
+        'bulaşık makinesi tableti', 'bulasik makinesi tableti', 'bulaşık tableti', 'finish', 'fairy',
+        'kağıt havlu', 'kagit havlu', 'peçete', 'islak mendil', 'ıslak mendil', 'zeytinyağı',
+        'zeytinyagi', 'makarna', 'pirinç', 'çikolata', 'cikolata', 'bisküvi', 'cips', 'içecek',
+        'kahve', 'çay', 'süt', 'peynir', 'kedi maması', 'köpek maması',
+    ],
+    'yapi_oto': [
+        'matkap', 'vidalama', 'hırdavat', 'alet çantası', 'tornavida', 'duvar boyası', 'oto lastik',
+        'kış lastiği', 'yaz lastiği', 'motor yağı', 'akü', 'silecek', 'araç içi', 'oto aksesuar', 'bahçe', 'hortum',
+        'çim biçme', 'jeneratör', 'kompresör', 'merdiven', 'makita', 'dewalt',
+    ],
+    'kitap_hobi': [
+        'kitap', 'dergi', 'playstation', 'ps5', 'ps4', 'xbox', 'nintendo', 'oyun konsolu',
+        'oyun kolu', 'gamepad', 'lego', 'puzzle', 'yapboz', 'gitar', 'piyano', 'keman', 'kutu oyunu',
+        'masa oyunu',
+    ],
+}
+
+def _fold(text: str) -> str:
+    # Noktasız ı, i ile aynı sayılır: büyük harfli marka/model adları ("IPHONE", "XIAOMI")
+    # Türkçe küçültmede "ıphone" olur; hem metin hem anahtar kelimeler bu şekilde eşlenir
+    return text.replace('ı', 'i')
+
+
+_KEYWORD_CATEGORY = {
+    _fold(keyword): category for category, keywords in CATEGORY_KEYWORDS.items() for keyword in keywords
+}
+# Uzun ifadeler önce denenir ("bebek bezi" "bebek"ten önce); kelime başında, önek olarak eşleşir
+_KEYWORD_RE = re.compile(
+    r'(?<!\w)(' + '|'.join(re.escape(k) for k in sorted(_KEYWORD_CATEGORY, key=len, reverse=True)) + ')'
+)
+_URL_RE = re.compile(r'https?://\S+')
+
+
+def _normalize(text: str) -> str:
+    # Türkçe büyük I/İ harflerini lower() öncesi doğru karşılıklarına çevir
+    return _fold(_URL_RE.sub(' ', text).replace('I', 'ı').replace('İ', 'i').lower())
+
+
+class CategoryClassifier:
+    """Mesaj metnini anahtar kelimelerle puanlayıp kategori ve güven değeri döndürür.
+
+    Her eşleşen farklı kelime 1, çok kelimeli ifadeler 2 puan verir. Güven,
+    en yüksek kategorinin toplam puana oranıdır. Tek kelimelik eşleşme
+    ("kahve" -> "kahverengi") oranı 1.0 yapacağı için en yüksek kategoride
+    en az min_hits farklı kelime de aranır; threshold veya min_hits altında
+    kalan ve hiç eşleşme olmayan mesajlar için kategori None döner (AI'ya
+    bırakılır).
+    """
+
+    def __init__(self, threshold: float = 0.85, min_hits: int = 2):
+        self.threshold = threshold
+        self.min_hits = min_hits
+        self.checked = 0
+        self.confident = 0
+
+    def matches(self, text: str) -> dict:
+        """{kategori: eşleşen farklı kelimeler}"""
+        matches = {}
+        for keyword in set(_KEYWORD_RE.findall(_normalize(text or ''))):
+            matches.setdefault(_KEYWORD_CATEGORY[keyword], set()).add(keyword)
+        return matches
+
+    @staticmethod
+    def _scores(matches: dict) -> dict:
+        return {
+            category: sum(2 if ' ' in keyword else 1 for keyword in keywords)
+            for category, keywords in matches.items()
+        }
+
+    def score(self, text: str) -> dict:
+        return self._scores(self.matches(text))
+
+    def classify(self, text: str) -> Tuple[Optional[str], float]:
+        self.checked += 1
+        matches = self.matches(text)
+        if not matches:
+            return None, 0.0
+        scores = self._scores(matches)
+        category = max(scores, key=scores.get)
+        confidence = scores[category] / sum(scores.values())
+        if confidence < self.threshold or len(matches[category]) < self.min_hits:
+            return None, confidence
+        self.confident += 1
+        return category, confidence
+
+    def stats(self) -> dict:
+        return {
+            'checked': self.checked,
+            'confident': self.confident,
+            'confident_rate': round(self.confident / self.checked, 3) if self.checked else 0.0,
+        }
@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+from typing import Dict, List
+
+from telethon import utils
+from telethon.errors import RPCError
+
+logger = logging.getLogger("TelegramDealBot")
+
+
+def _id_candidates(entry: str) -> List[int]:
+    """Sayısal kanal girdisinin olası işaretli (marked) peer ID'leri.
+
+    '-1001234' zaten kanal ID'sidir; '-1234' hem grup hem de başındaki -100'ü
+    unutulmuş kanal olabilir; '1234' kanal, grup veya kullanıcı olabilir.
+    """
+    number = int(entry)
+    if entry.startswith('-100'):
+        return [number]
+    if number < 0:
+        return [int(f"-100{-number}"), number]
+    return [int(f"-100{number}"), -number, number]
+
+
+class ChannelResolver:
+    """SOURCE_CHANNELS girdilerini başlangıçta bir kez işaretli peer ID'lere çözümler.
+
+    Sonuçlar cache_path'teki JSON dosyasında saklanır; sonraki açılışlarda
+    ağa çıkılmaz. Sayısal girdiler hesabın dialog listesiyle eşleştirilir,
+    @kullanıcı_adı girdileri get_input_entity ile çözülür. Çözülemeyen
+    girdiler uyarıyla atlanır, bot çalışmaya devam eder.
+    """
+
+    def __init__(self, client, cache_path: str):
+        self.client = client
+        self.cache_path = cache_path
+        self._cache = self._load()
+        self._dialogs = None
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Kanal cache'i okunamadı, yeniden çözümlenecek: {e}")
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.cache_path)
+
+    async def _dialog_names(self) -> Dict[int, str]:
+        # Dialog listesi sadece cache'te olmayan sayısal girdi varsa bir kez çekilir
+        if self._dialogs is None:
+            self._dialogs = {}
+            async for dialog in self.client.iter_dialogs():
+                self._dialogs[dialog.id] = getattr(dialog.entity, 'username', None) or dialog.name
+        return self._dialogs
+
+    async def _resolve_entry(self, entry: str):
+        if entry.lstrip('-').isdigit():
+            dialogs = await self._dialog_names()
+            for peer_id in _id_candidates(entry):
+                if peer_id in dialogs:
+                    return {'id': peer_id, 'name': dialogs[peer_id]}
+            return None
+        entity = await self.client.get_entity(entry)
+        name = getattr(entity, 'username', None) or getattr(entity, 'title', None) or entry
+        return {'id': utils.get_peer_id(entity), 'name': name}
+
+    async def resolve(self, entries: List[str]) -> Dict[int, str]:
+        """Girdileri çözümle, {işaretli peer ID: kanal adı} döndür"""
+        resolved = {}
+        changed = False
+        for entry in entries:
+            peer = self._cache.get(entry)
+            if peer is None:
+                try:
+                    peer = await self._resolve_entry(entry)
+                except (ValueError, TypeError, RPCError) as e:
+                    logger.warning(f"⚠️ Kanal çözümlenemedi '{entry}': {e}")
+                    continue
+                if peer is None:
+                    logger.warning(f"⚠️ Kanal '{entry}' hesabın sohbetleri arasında bulunamadı, atlanıyor")
+                    continue
+                self._cache[entry] = peer
+                changed = True
+                logger.info(f"📡 Kanal çözümlendi: {entry} -> {peer['id']} ({peer['name']})")
+            resolved[peer['id']] = peer['name']
+        if changed:
+            self._save()
+        return resolved
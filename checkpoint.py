@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from typing import Optional
+
+
+class ChannelCheckpoints:
+    """Kanal başına işlenen son mesaj ID'sini SQLite'ta (WAL) saklar.
+
+    Bot kapalıyken kaçırılan mesajlar açılışta bu ID'den sonrası çekilerek
+    işlenir. Mesajlar paralel işlenip sırasız bittiği için checkpoint bir
+    alt su seviyesidir: begin() ile işlemeye alınan, finish() ile biten
+    mesajlardan, kendinden küçük ID'lerin hepsi bitmiş olan en büyüğüne
+    kadar ilerletilir. Bitmeyen (iptal edilen) mesaj checkpoint'in önünde
+    kalır ve bir sonraki açılışta tekrar işlenir. hold() ile tutulan kanalın
+    checkpoint'i release() çağrılana kadar ilerlemez (catch-up mesajları
+    kaydedilene kadar).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "peer_id INTEGER PRIMARY KEY, last_id INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.commit()
+        self._in_flight = defaultdict(set)
+        self._finished = defaultdict(set)
+        self._holds = set()
+
+    def get(self, peer_id: int) -> Optional[int]:
+        row = self._db.execute("SELECT last_id FROM checkpoints WHERE peer_id = ?", (peer_id,)).fetchone()
+        return row[0] if row else None
+
+    def advance(self, peer_id: int, message_id: int):
+        """Checkpoint'i doğrudan message_id'ye taşı (geri gitmez)"""
+        self._db.execute(
+            "INSERT INTO checkpoints (peer_id, last_id, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(peer_id) DO UPDATE SET last_id = MAX(last_id, excluded.last_id), "
+            "updated_at = excluded.updated_at",
+            (peer_id, message_id, time.time()),
+        )
+        self._db.commit()
+
+    def begin(self, peer_id: int, message_id: int):
+        """Mesaj işlemeye alındı; bitene kadar checkpoint onu geçmez"""
+        self._in_flight[peer_id].add(message_id)
+
+    def finish(self, peer_id: int, message_id: int):
+        """Mesaj bitti (veya işlenecek bir şey yoktu); alt su seviyesine kadar ilerlet"""
+        self._in_flight[peer_id].discard(message_id)
+        self._finished[peer_id].add(message_id)
+        self._flush(peer_id)
+
+    def hold(self, peer_id: int):
+        self._holds.add(peer_id)
+
+    def release(self, peer_id: int):
+        self._holds.discard(peer_id)
+        self._flush(peer_id)
+
+    def _flush(self, peer_id: int):
+        if peer_id in self._holds:
+            return
+        finished = self._finished[peer_id]
+        in_flight = self._in_flight[peer_id]
+        low = min(in_flight) if in_flight else None
+        safe = [m for m in finished if low is None or m < low]
+        if safe:
+            self.advance(peer_id, max(safe))
+            finished.difference_update(safe)
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import zlib
+
+logger = logging.getLogger("TelegramDealBot")
+
+
+class DealQueue:
+    """Gelen deal mesajlarını kuyruğa alıp N adet async worker ile işler.
+
+    Varsayılan olarak tüm worker'lar tek kuyruktan çeker; tek kanaldan gelen
+    yoğunlukta da bütün worker'lar çalışır. preserve_channel_order açıksa her
+    kanal sabit bir worker'a bağlanır (kanal içi sıra korunur, o kanalın
+    mesajları tek tek işlenir). maxsize her iki modda da toplam kapasitedir.
+    """
+
+    def __init__(self, handler, worker_count: int = 4, maxsize: int = 500, preserve_channel_order: bool = False):
+        self.handler = handler
+        self.worker_count = max(1, worker_count)
+        self.maxsize = maxsize
+        self.preserve_channel_order = preserve_channel_order
+        self._queues = []
+        self._slots = None
+        self._workers = []
+        self.processed = 0
+        self.failed = 0
+
+    def start(self):
+        """Kuyrukları ve worker'ları oluştur (event loop içinden çağrılmalı)"""
+        if self.preserve_channel_order:
+            # Shard kuyrukları sınırsız; kapasite ortak semaphore ile sınırlanır,
+            # böylece yoğun bir kanal maxsize'ın shard payında takılmaz
+            shard_count = self.worker_count
+            self._queues = [asyncio.Queue() for _ in range(shard_count)]
+            if self.maxsize > 0:
+                self._slots = asyncio.Semaphore(self.maxsize)
+        else:
+            shard_count = 1
+            self._queues = [asyncio.Queue(maxsize=self.maxsize)]
+        for i in range(self.worker_count):
+            queue = self._queues[i % shard_count]
+            self._workers.append(asyncio.create_task(self._worker(i, queue)))
+        logger.info(f"👷 {self.worker_count} worker başlatıldı (kanal sırası korunuyor: {self.preserve_channel_order})")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @property
+    def depth(self) -> int:
+        """Kuyrukta bekleyen toplam iş sayısı"""
+        return sum(q.qsize() for q in self._queues)
+
+    def stats(self) -> dict:
+        return {
+            'depth': self.depth,
+            'workers': self.worker_count,
+            'processed': self.processed,
+            'failed': self.failed,
+        }
+
+    def _queue_for(self, key) -> asyncio.Queue:
+        if len(self._queues) == 1:
+            return self._queues[0]
+        # hash() process'e göre değişir, crc32 sabit dağılım verir
+        return self._queues[zlib.crc32(str(key).encode()) % len(self._queues)]
+
+    async def put(self, key, *args):
+        """İşi kuyruğa ekle. Kuyruk doluysa yer açılana kadar bekler (backpressure)."""
+        if self._slots is not None:
+            await self._slots.acquire()
+        await self._queue_for(key).put(args)
+
+    async def _worker(self, index: int, queue: asyncio.Queue):
+        while True:
+            args = await queue.get()
+            try:
+                await self.handler(*args)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ Worker {index} hatası: {e}", exc_info=True)
+            finally:
+                queue.task_done()
+                if self._slots is not None:
+                    self._slots.release()
@@ -0,0 +1,179 @@
+import hashlib
+import logging
+import math
+import os
+import re
+import sqlite3
+import time
+from typing import List, Optional
+from urllib.parse import urlparse
+
+from cache import normalize_url
+
+logger = logging.getLogger("TelegramDealBot")
+
+# Mağaza bazında ürün kimliği desenleri (host içinde geçen kelime -> path regex)
+_PRODUCT_ID_PATTERNS = [
+    ('amazon', re.compile(r'/(?:dp|gp/product|gp/aw/d|exec/obidos/asin)/([A-Z0-9]{10})(?:[/?]|$)', re.I)),
+    ('trendyol', re.compile(r'-p-(\d+)(?:[/?]|$)')),
+    ('hepsiburada', re.compile(r'-pm?-([A-Z0-9]{8,})(?:[/?]|$)', re.I)),
+    ('n11', re.compile(r'-P(\d+)(?:[/?]|$)')),
+]
+_URL_RE = re.compile(r'https?://\S+')
+_NON_WORD_RE = re.compile(r'[^\w]+')
+
+
+def canonical_product_key(url: str) -> str:
+    """Linkten mağazadan bağımsız ürün kimliği çıkar (ASIN, Trendyol/Hepsiburada ID) - yoksa normalize URL"""
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return 'url:' + url
+    host = (parsed.hostname or '').lower()
+    for store, pattern in _PRODUCT_ID_PATTERNS:
+        if store in host:
+            match = pattern.search(parsed.path)
+            if match:
+                product_id = match.group(1)
+                if store == 'amazon':
+                    product_id = product_id.upper()
+                return f"{store}:{product_id}"
+    return 'url:' + normalize_url(url)
+
+
+def content_key(text: str, link: str = "", image_bytes: bytes = None) -> str:
+    """Mesaj metni, kanonik link ve görsel içeriğinden türetilen içerik adresi (AI sonuç cache'i için)"""
+    normalized = _URL_RE.sub(' ', text or '').lower()
+    normalized = _NON_WORD_RE.sub(' ', normalized).strip()
+    digest = hashlib.sha256(normalized.encode('utf-8'))
+    digest.update(b'\0' + canonical_product_key(link).encode('utf-8') if link else b'\0')
+    digest.update(b'\0' + hashlib.sha256(image_bytes).digest() if image_bytes else b'\0')
+    return digest.hexdigest()
+
+
+class BloomFilter:
+    """Basit bloom filter - 'kesin yok' cevabı için, 'var' cevabı index'ten doğrulanır"""
+
+    def __init__(self, expected_items: int, fp_rate: float = 0.01):
+        expected_items = max(1, expected_items)
+        self.size = max(8, int(-expected_items * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / expected_items * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.sha256(key.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class DedupIndex:
+    """Kanallar arası tekrar eden deal'leri ağ/AI işinden önce yakalayan index.
+
+    Bellekte zaman penceresi boyunca dönen iki bloom filter tutulur; filtre
+    'belki var' derse SQLite index'ten pencere içinde olup olmadığı doğrulanır.
+    Anahtar claim eden deal (owner) ile birlikte saklanır: aynı deal yarıda
+    kalıp tekrar işlenirse kendi anahtarlarına takılmaz.
+    """
+
+    def __init__(self, path: str, window_hours: float = 24, expected_items: int = 20000):
+        self.path = path
+        self.window_seconds = window_hours * 3600
+        self.expected_items = expected_items
+        self.duplicates = 0
+        self.unique = 0
+        self._current = BloomFilter(expected_items)
+        self._previous = BloomFilter(expected_items)
+        self._rotated_at = time.time()
+        self._db = None
+        try:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._db = sqlite3.connect(path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                "key TEXT PRIMARY KEY, seen_at REAL NOT NULL, owner TEXT)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(seen)")}
+            if 'owner' not in columns:
+                self._db.execute("ALTER TABLE seen ADD COLUMN owner TEXT")
+            self._db.execute("CREATE INDEX IF NOT EXISTS seen_at_idx ON seen(seen_at)")
+            self._db.commit()
+            self._load()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Dedup index açılamadı ({path}), sadece bellek kullanılacak: {e}")
+            self._db = None
+
+    def _load(self):
+        """Pencere içindeki kayıtları bloom filter'a yükle, eskileri sil"""
+        cutoff = time.time() - self.window_seconds
+        self._db.execute("DELETE FROM seen WHERE seen_at < ?", (cutoff,))
+        self._db.commit()
+        count = 0
+        for (key,) in self._db.execute("SELECT key FROM seen"):
+            self._current.add(key)
+            count += 1
+        if count:
+            logger.info(f"🧹 Dedup index yüklendi: {count} kayıt")
+
+    def _rotate_if_needed(self, now: float):
+        if now - self._rotated_at >= self.window_seconds:
+            self._previous = self._current
+            self._current = BloomFilter(self.expected_items)
+            self._rotated_at = now
+            if self._db is not None:
+                self._db.execute("DELETE FROM seen WHERE seen_at < ?", (now - self.window_seconds,))
+                self._db.commit()
+
+    def _seen_recently(self, key: str, now: float, owner: str = None) -> bool:
+        if key not in self._current and key not in self._previous:
+            return False
+        if self._db is None:
+            # Disk yoksa bloom cevabına güven (düşük false-positive oranı)
+            return True
+        row = self._db.execute("SELECT seen_at, owner FROM seen WHERE key = ?", (key,)).fetchone()
+        if not row or row[0] < now - self.window_seconds:
+            return False
+        return owner is None or row[1] != owner
+
+    def claim(self, keys: List[str], owner: str = None) -> Optional[str]:
+        """Anahtarlardan biri pencere içinde başka bir deal tarafından görüldüyse onu döndür,
+        değilse hepsini owner adına kaydet ve None döndür"""
+        keys = [k for k in keys if k]
+        now = time.time()
+        self._rotate_if_needed(now)
+        for key in keys:
+            if self._seen_recently(key, now, owner):
+                self.duplicates += 1
+                return key
+        for key in keys:
+            self._current.add(key)
+        if self._db is not None:
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO seen (key, seen_at, owner) VALUES (?, ?, ?)",
+                    [(k, now, owner) for k in keys],
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.debug(f"Dedup index yazma hatası: {e}")
+        self.unique += 1
+        return None
+
+    def stats(self) -> dict:
+        return {'unique': self.unique, 'duplicates': self.duplicates}
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -36,6 +36,29 @@ ssh -i "$SSH_KEY_PATH" "$SSH_USER@$SERVER_IP" "mkdir -p $REMOTE_DIR"
 echo -e "${YELLOW}📦 Dosyalar kopyalanıyor...${NC}"
 scp -i "$SSH_KEY_PATH" \
     telegram_bot.py \
+    deal_queue.py \
+    http_fetcher.py \
+    cache.py \
+    dedup.py \
+    price_extractor.py \
+    html_meta.py \
+    structured_data.py \
+    ai_batcher.py \
+    category_classifier.py \
+    firestore_writer.py \
+    outbox.py \
+    image_uploader.py \
+    image_prep.py \
+    rate_limiter.py \
+    host_control.py \
+    media_fetcher.py \
+    channel_resolver.py \
+    link_extractor.py \
+    checkpoint.py \
+    store_resolver.py \
+    stores.json \
+    metrics.py \
+    log_setup.py \
     Dockerfile \
     docker-compose.yml \
     requirements.txt \
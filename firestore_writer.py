@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import time
+import uuid
+
+from log_setup import STEP_LOGGER_NAME
+from outbox import Outbox
+
+logger = logging.getLogger("TelegramDealBot")
+step_log = logging.getLogger(STEP_LOGGER_NAME)
+
+# Firestore tek batch'te en fazla 500 yazmaya izin verir
+_FIRESTORE_BATCH_LIMIT = 500
+
+
+class FirestoreWriter:
+    """Deal kayıtlarını kuyrukta toplayıp Firestore'a toplu (batch) yazan arka plan yazıcısı.
+
+    Kuyruk batch_size kayda ulaşınca veya ilk kayıttan flush_interval saniye
+    geçince yazılır. Senkron Firestore çağrıları asyncio.to_thread ile event
+    loop dışında çalışır.
+
+    outbox verilirse kayıt önce diske yazılır, commit başarılı olunca silinir;
+    arka plandaki replayer başarısız veya kuyruğa sığmayan kayıtları
+    replay_interval saniyede bir tekrar gönderir. outbox yoksa kuyruk doluysa
+    submit() yer açılana kadar bekler.
+
+    db None olabilir (outbox ile): kayıtlar sadece outbox'ta birikir, replayer
+    her turda connect() ile bağlanmayı dener ve bağlantı kurulunca gönderir.
+    Batch commit'i başarısız olursa kayıtlar tek tek yazılır; böylece hatalı
+    bir kayıt batch'teki diğerlerini de sürekli düşürmez.
+
+    metrics verilirse commit süreleri 'firestore_flush' aşaması olarak ölçülür.
+
+    Kuyruk elemanları (doc_id, data, version) üçlüsüdür. Yazılmakta olan bir
+    doc_id tekrar gönderilirse yeni hali bekletilir ve eski yazma bitince
+    kuyruğa alınır; outbox'tan sadece yazılan version silinir.
+    """
+
+    def __init__(self, db, collection: str = 'deals', batch_size: int = 20,
+                 flush_interval: float = 1.0, max_pending: int = 1000,
+                 outbox: Outbox = None, replay_interval: float = 30.0, connect=None, metrics=None):
+        self.db = db
+        self.metrics = metrics
+        self.connect = connect
+        self.collection = collection
+        self.batch_size = max(1, min(batch_size, _FIRESTORE_BATCH_LIMIT))
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.outbox = outbox
+        self.replay_interval = replay_interval
+        self._queue = None
+        self._task = None
+        self._replayer = None
+        self._inflight = set()  # kuyrukta veya yazılmakta olan doc_id'ler
+        self._dirty = {}  # yazılırken tekrar gönderilen doc_id -> (data, version)
+        self.replayed = 0
+        self.flushes = 0
+        self.written = 0
+        self.failed = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def start(self):
+        """Kuyruğu ve yazıcı görevini oluştur (event loop içinden çağrılmalı)"""
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run())
+        if self.outbox is not None:
+            self._replayer = asyncio.create_task(self._replay_loop())
+
+    async def submit(self, data: dict, doc_id: str = None):
+        """Kaydı yazma kuyruğuna ekle; doc_id verilmezse Firestore otomatik id üretir"""
+        if self.outbox is None:
+            await self._queue.put((doc_id, data, None))
+            return
+        doc_id = doc_id or uuid.uuid4().hex
+        version = self.outbox.add(doc_id, data)
+        # Kayıt artık diskte; kuyruk doluysa veya Firestore yoksa replayer'a bırakılır
+        if doc_id in self._inflight:
+            self._dirty[doc_id] = (data, version)
+        else:
+            self._enqueue(doc_id, data, version)
+
+    def _enqueue(self, doc_id: str, data: dict, version: int) -> bool:
+        if self.db is None or doc_id in self._inflight:
+            return False
+        try:
+            self._queue.put_nowait((doc_id, data, version))
+        except asyncio.QueueFull:
+            return False
+        self._inflight.add(doc_id)
+        return True
+
+    async def _replay_loop(self):
+        while True:
+            try:
+                if self.db is None:
+                    await self._try_connect()
+                pending = self.outbox.pending(limit=self.max_pending)
+                replayed = sum(self._enqueue(doc_id, data, version) for doc_id, data, version in pending)
+                if replayed:
+                    self.replayed += replayed
+                    logger.info(f"♻️ Outbox'tan {replayed} kayıt tekrar yazma kuyruğuna alındı")
+            except Exception as e:
+                logger.error(f"❌ Outbox tekrar gönderme hatası: {e}")
+            await asyncio.sleep(self.replay_interval)
+
+    async def _try_connect(self):
+        if self.connect is None:
+            return
+        db = await asyncio.to_thread(self.connect)
+        if db is not None:
+            self.db = db
+            logger.info(f"✅ Firestore bağlantısı kuruldu, outbox'taki {self.outbox.count()} kayıt gönderilecek")
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(items) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(items)
+
+    async def _flush(self, items: list):
+        started = time.perf_counter()
+        try:
+            try:
+                await asyncio.to_thread(self._commit, items)
+                written, failed = items, []
+            except Exception as e:
+                logger.error(f"❌ Firestore toplu kayıt hatası ({len(items)} kayıt): {e}")
+                written, failed = await self._commit_each(items) if len(items) > 1 else ([], items)
+            if self.metrics is not None:
+                self.metrics.observe('firestore_flush', time.perf_counter() - started)
+                if failed:
+                    self.metrics.error('firestore_flush')
+            self.written += len(written)
+            self.failed += len(failed)
+            if self.outbox is not None:
+                if written:
+                    self.outbox.remove([(doc_id, version) for doc_id, _, version in written])
+                if failed:
+                    self.outbox.mark_failed([(doc_id, version) for doc_id, _, version in failed])
+            if written:
+                step_log.info("✅ Firestore'a %d kayıt yazıldı", len(written))
+        finally:
+            self._inflight.difference_update(doc_id for doc_id, _, _ in items)
+            # Yazılırken gelen yeni halleri kuyruğa al (sığmazsa replayer outbox'tan alır)
+            for doc_id, _, _ in items:
+                if doc_id in self._dirty:
+                    data, version = self._dirty.pop(doc_id)
+                    self._enqueue(doc_id, data, version)
+            self.flushes += 1
+            self.last_batch_size = len(items)
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            self._total_flush_ms += self.last_flush_ms
+            for _ in items:
+                self._queue.task_done()
+
+    async def _commit_each(self, items: list):
+        """Batch'i kayıt kayıt yaz, (yazılanlar, yazılamayanlar) döndür"""
+        written, failed = [], []
+        for item in items:
+            try:
+                await asyncio.to_thread(self._commit, [item])
+                written.append(item)
+            except Exception as e:
+                failed.append(item)
+                logger.error(f"❌ Firestore kayıt hatası ({item[0]}): {e}")
+        return written, failed
+
+    def _commit(self, items: list):
+        batch = self.db.batch()
+        collection = self.db.collection(self.collection)
+        for doc_id, data, _ in items:
+            doc_ref = collection.document(doc_id) if doc_id else collection.document()
+            batch.set(doc_ref, data)
+        batch.commit()
+
+    def stats(self) -> dict:
+        return {
+            'depth': self.depth,
+            'flushes': self.flushes,
+            'written': self.written,
+            'failed': self.failed,
+            'last_batch_size': self.last_batch_size,
+            'last_flush_ms': round(self.last_flush_ms, 1),
+            'avg_flush_ms': round(self._total_flush_ms / self.flushes, 1) if self.flushes else 0.0,
+            'replayed': self.replayed,
+            'outbox_pending': self.outbox.count() if self.outbox is not None else 0,
+            'outbox_dead': self.outbox.dead_count() if self.outbox is not None else 0,
+        }
+
+    async def close(self):
+        """Kuyrukta kalanları yazıp görevi durdur"""
+        if self._task is None:
+            return
+        if self._replayer is not None:
+            self._replayer.cancel()
+            await asyncio.gather(self._replayer, return_exceptions=True)
+            self._replayer = None
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger("TelegramDealBot")
+
+
+class AdaptiveLimiter:
+    """AIMD eşzamanlılık sınırı: her 'limit' başarıda sınır 1 artar, hatada yarıya iner.
+
+    Sabit semaphore yerine kullanılır; host yavaşladığında veya hata verdiğinde
+    aynı anda gönderilen istek sayısı kendiliğinden düşer. Başarılı isteğin
+    süresi verilirse gecikme de izlenir: ortalama gecikme (EWMA) host'un
+    gördüğü en iyi gecikmenin slow_factor katını aşarsa bu da tıkanma sayılır
+    ve sınır yarıya iner (pencere başına en fazla bir kez).
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 16, slow_factor: float = 2.0):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.slow_factor = slow_factor
+        self.in_flight = 0
+        self.latency_ewma = None
+        self._baseline = None
+        self._successes = 0
+        self._since_decrease = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        while self.in_flight >= self.limit:
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future in self._waiters:
+                    self._waiters.remove(future)
+                else:
+                    # Uyandırılmışken iptal edildi, sırayı bir sonrakine ver
+                    self._wake()
+                raise
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    def _wake(self):
+        free = self.limit - self.in_flight
+        while free > 0 and self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                free -= 1
+
+    def on_success(self, latency: float = None):
+        self._since_decrease += 1
+        if latency is not None and self._is_slow(latency):
+            # Önceki azaltmanın etkisi görülmeden (bir pencere dolmadan) tekrar azaltılmaz
+            if self._since_decrease >= self.limit:
+                self._decrease()
+            return
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.maximum:
+            self.limit += 1
+            self._successes = 0
+            self._wake()
+
+    def on_failure(self):
+        self._decrease()
+
+    def _is_slow(self, latency: float) -> bool:
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+        # En iyi gecikme daha hızlı cevaplara hemen iner, yavaşça (%1) yukarı kayar;
+        # host kalıcı olarak yavaşlarsa sınır sürekli düşük kalmaz
+        self._baseline = latency if self._baseline is None else min(latency, self._baseline * 1.01)
+        return self.latency_ewma > self._baseline * self.slow_factor
+
+    def _decrease(self):
+        self.limit = max(self.minimum, self.limit // 2)
+        self._successes = 0
+        self._since_decrease = 0
+
+
+class CircuitBreaker:
+    """Art arda failure_threshold hatadan sonra host'a istekleri reset_timeout saniye keser.
+
+    Süre dolunca tek bir deneme isteğine izin verilir (half_open); başarılıysa
+    devre kapanır, başarısızsa tekrar açılır. Deneme isteği sonuçlanmadan
+    iptal edilirse release() ile hakkı geri verilmelidir, yoksa başka deneme
+    yapılamaz.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opens = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def blocked(self) -> bool:
+        """Devre açık ve bekleme süresi dolmamışsa True (durumu değiştirmez)"""
+        return self.state == self.OPEN and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def release(self):
+        """Sonuçlanmadan iptal edilen isteğin deneme hakkını geri ver"""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"✅ {self.name} devre kesici kapandı, istekler devam ediyor")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+            self.state = self.OPEN
+            self.opens += 1
+            self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+            logger.warning(f"🚫 {self.name} devre kesici açıldı ({self.failures} hata), {self.reset_timeout:g}s istek gönderilmeyecek")
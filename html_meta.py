@@ -0,0 +1,184 @@
+import logging
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from log_setup import STEP_LOGGER_NAME
+from structured_data import ProductRecord, apply_amazon_selectors, parse_json_ld
+
+logger = logging.getLogger("TelegramDealBot")
+step_log = logging.getLogger(STEP_LOGGER_NAME)
+
+# Fiyat içerebilen meta etiketleri (property/name/itemprop değeri)
+_PRICE_META_KEYS = {'product:price:amount', 'og:price:amount', 'price'}
+
+
+def make_absolute_url(url: str, base_url: str) -> str:
+    if not url or not url.strip():
+        return ''
+    url = url.strip()
+    if url.startswith('http://') or url.startswith('https://'):
+        return url
+    if url.startswith('//'):
+        return 'https:' + url
+    return urljoin(base_url, url)
+
+
+class StreamingMetaExtractor(HTMLParser):
+    """HTML'i parça parça okuyup og:/twitter: meta etiketleri ve JSON-LD'den görsel, başlık ve fiyat çıkarır.
+
+    Görsel, başlık ve fiyatın üçü de bulunduğunda feed() True döner; çağıran
+    taraf indirmeyi orada kesebilir.
+    """
+
+    def __init__(self, parse_price):
+        super().__init__(convert_charrefs=True)
+        self.parse_price = parse_price
+        self.og_image = ''
+        self.twitter_image = ''
+        self.json_ld = ProductRecord()
+        self.img_tag_image = ''
+        self.og_title = ''
+        self.title = ''
+        self.price = 0.0
+        self.done = False
+        self._in_title = False
+        self._title_parts = []
+        self._in_json_ld = False
+        self._json_ld_parts = []
+
+    def feed(self, chunk: str) -> bool:
+        if not self.done:
+            super().feed(chunk)
+        return self.done
+
+    def _check_done(self):
+        image = self.og_image or self.twitter_image or self.json_ld.image
+        self.done = bool(image and (self.og_title or self.title) and self.price > 0)
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == 'meta':
+            attrs = dict(attrs)
+            key = (attrs.get('property') or attrs.get('name') or attrs.get('itemprop') or '').lower()
+            content = (attrs.get('content') or '').strip()
+            if not content:
+                return
+            if key == 'og:image' and not self.og_image:
+                self.og_image = content
+            elif key == 'twitter:image' and not self.twitter_image:
+                self.twitter_image = content
+            elif key == 'og:title' and not self.og_title:
+                self.og_title = content
+            elif key in _PRICE_META_KEYS and not self.price:
+                self.price = self.parse_price(content)
+            self._check_done()
+        elif tag == 'title' and not self.title:
+            self._in_title = True
+        elif tag == 'script':
+            attrs = dict(attrs)
+            if (attrs.get('type') or '').lower() == 'application/ld+json':
+                self._in_json_ld = True
+                self._json_ld_parts = []
+        elif tag == 'img' and not self.img_tag_image:
+            attrs = dict(attrs)
+            self.img_tag_image = (attrs.get('src') or attrs.get('data-src') or '').strip()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+        elif self._in_json_ld:
+            self._json_ld_parts.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._in_title:
+            self._in_title = False
+            self.title = ''.join(self._title_parts).strip()
+            self._check_done()
+        elif tag == 'script' and self._in_json_ld:
+            self._in_json_ld = False
+            parse_json_ld(''.join(self._json_ld_parts), self.parse_price, self.json_ld)
+            if not self.price:
+                self.price = self.json_ld.price
+            self._check_done()
+
+    def result(self, base_url: str) -> dict:
+        """Bulunanları extract_html_data ile aynı formatta döndür (görsel önceliği: og > twitter > JSON-LD > img)"""
+        image = self.og_image or self.twitter_image or self.json_ld.image or self.img_tag_image
+        record = ProductRecord(
+            image=make_absolute_url(image, base_url),
+            title=self.og_title or self.title or self.json_ld.title,
+            price=self.price,
+            original_price=self.json_ld.original_price,
+            availability=self.json_ld.availability,
+            currency=self.json_ld.currency,
+        )
+        return record.as_dict()
+
+
+def extract_html_data(html: str, base_url: str, parse_price) -> dict:
+    """Sayfanın tamamından (BeautifulSoup) görsel, başlık, fiyat ve JSON-LD/Amazon verisini çıkar"""
+    data = ProductRecord().as_dict()
+    if not html: 
+        logger.warning("⚠️ HTML boş, veri çıkarılamıyor")
+        return data
+    try:
+        soup = BeautifulSoup(html, 'html.parser')  # lxml yerine html.parser daha güvenilir
+
+        # JSON-LD blokları tek geçişte parse edilir; görsel, başlık, fiyat,
+        # eski fiyat, stok ve para birimi aynı kayda yazılır
+        json_ld = ProductRecord()
+        for script in soup.find_all('script', type='application/ld+json'):
+            parse_json_ld(script.string, parse_price, json_ld)
+        # Amazon sayfalarında JSON-LD yerine DOM seçicileri
+        if 'amazon.' in (urlparse(base_url).hostname or ''):
+            apply_amazon_selectors(json_ld, soup, parse_price)
+
+        # 1. Görseli çek - Önce og:image (en yaygın), sonra twitter:image, JSON-LD ve ilk img tag'i
+        image, source = '', ''
+        img_tag = soup.find('meta', property='og:image')
+        if img_tag and img_tag.get('content', '').strip():
+            image, source = img_tag['content'], 'og:image'
+        if not image:
+            img_tag = soup.find('meta', attrs={'name': 'twitter:image'})
+            if img_tag and img_tag.get('content', '').strip():
+                image, source = img_tag['content'], 'twitter:image'
+        if not image and json_ld.image:
+            image, source = json_ld.image, 'JSON-LD'
+        if not image:
+            img_tag = soup.find('img', src=True)
+            if img_tag:
+                image, source = img_tag.get('src', '').strip() or img_tag.get('data-src', '').strip(), 'img tag'
+        if image:
+            data['image'] = make_absolute_url(image, base_url)
+            step_log.info("✅ Görsel bulundu (%s): %.80s", source, data['image'])
+
+        # Başlık çek
+        title_tag = soup.find('meta', property='og:title')
+        if title_tag:
+            data['title'] = title_tag.get('content', '').strip()
+        if not data['title']:
+            title_tag = soup.find('title')
+            if title_tag:
+                data['title'] = title_tag.get_text().strip()
+        if not data['title']:
+            data['title'] = json_ld.title
+
+        data['price'] = json_ld.price
+        data['original_price'] = json_ld.original_price
+        data['availability'] = json_ld.availability
+        data['currency'] = json_ld.currency
+        if data['price']:
+            step_log.info("✅ Fiyat bulundu (JSON-LD): %s TL", data['price'])
+
+        # Fiyat bulunamadıysa log
+        if not data['price']:
+            logger.warning("⚠️ HTML'den fiyat bulunamadı, AI'den gelecek")
+        if not data['image']:
+            logger.warning("⚠️ Görsel bulunamadı")
+
+    except Exception as e:
+        logger.error(f"❌ HTML analiz hatası: {e}", exc_info=True)
+    return data
@@ -0,0 +1,216 @@
+import asyncio
+import codecs
+import logging
+import random
+import re
+from urllib.parse import urlparse
+
+from curl_cffi import CurlError
+from curl_cffi.requests import AsyncSession
+
+from host_control import AdaptiveLimiter, CircuitBreaker
+from log_setup import STEP_LOGGER_NAME
+from rate_limiter import HostRateLimiter
+
+logger = logging.getLogger("TelegramDealBot")
+step_log = logging.getLogger(STEP_LOGGER_NAME)
+
+_CHARSET_RE = re.compile(r'charset=["\']?([\w-]+)', re.I)
+
+
+class AsyncFetcher:
+    """Uzun ömürlü curl_cffi AsyncSession üzerinden ürün sayfası çeken katman.
+
+    Bağlantılar deal'ler arasında açık tutulur; eşzamanlı istek sayısı hem
+    global hem host bazında sınırlanır, her aşamanın (bağlantı, okuma, toplam)
+    kendi timeout'u vardır. host_rate > 0 ise aynı host'a saniyede en fazla
+    host_rate istek (host_burst kadar ani artışla) gönderilir.
+
+    Host başına eşzamanlılık hata ve gecikmeye göre AIMD ile ayarlanır
+    (per_host_concurrency'den başlar, per_host_max_concurrency'ye kadar çıkar).
+    Zaman aşımı, bağlantı hatası, 429 ve 5xx cevapları jitter'lı üstel
+    beklemeyle max_retries kez tekrar denenir; art arda hata veren host için
+    devre kesici açılır. Denemeler ve beklemeler toplamda request_budget
+    saniyeyi aşmaz (her deneme kalan süreyle sınırlanır).
+    """
+
+    def __init__(self, max_concurrency: int = 20, per_host_concurrency: int = 4,
+                 connect_timeout: float = 5.0, read_timeout: float = 15.0, total_timeout: float = 20.0,
+                 impersonate: str = "chrome110", host_rate: float = 0.0, host_burst: float = 1.0,
+                 per_host_max_concurrency: int = 16, max_retries: int = 2, retry_base_delay: float = 0.5,
+                 breaker_failures: int = 5, breaker_reset_seconds: float = 60.0, request_budget: float = 25.0):
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_max_concurrency = per_host_max_concurrency
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.total_timeout = total_timeout
+        self.impersonate = impersonate
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.breaker_failures = breaker_failures
+        self.breaker_reset_seconds = breaker_reset_seconds
+        self.request_budget = request_budget
+        self._session = None
+        self._global_sem = None
+        self._host_limits = {}
+        self._breakers = {}
+        self._host_limiter = HostRateLimiter(host_rate, host_burst)
+        self.retries = 0
+        self.rejected = 0
+
+    def _ensure_session(self):
+        # Session ve semaphore'lar event loop içinde oluşturulmalı
+        if self._session is None:
+            self._session = AsyncSession(impersonate=self.impersonate, max_clients=self.max_concurrency)
+            self._global_sem = asyncio.Semaphore(self.max_concurrency)
+
+    def _host_limit(self, host: str) -> AdaptiveLimiter:
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = AdaptiveLimiter(self.per_host_concurrency, 1, self.per_host_max_concurrency)
+            self._host_limits[host] = limit
+        return limit
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(host, self.breaker_failures, self.breaker_reset_seconds)
+            self._breakers[host] = breaker
+        return breaker
+
+    async def fetch(self, url: str) -> dict:
+        """URL'i çek, başarılıysa {'html', 'final_url'} döndür, değilse {}"""
+        return await self._request(url, lambda: self._read_full(url))
+
+    async def fetch_stream(self, url: str, on_chunk, max_bytes: int = 2_000_000) -> dict:
+        """Gövdeyi parça parça indirip metin olarak on_chunk'a ver.
+
+        on_chunk True döndürürse (aranan veri bulundu) indirme orada kesilir.
+        Başarılıysa {'final_url', 'bytes_read', 'stopped_early'} döndürür, değilse {}.
+        """
+        return await self._request(url, lambda: self._read_stream(url, on_chunk, max_bytes))
+
+    async def _request(self, url: str, send) -> dict:
+        """send() -> (sonuç, HTTP durum kodu); host kontrolü, tekrar deneme ve devre kesici burada"""
+        self._ensure_session()
+        host = (urlparse(url).hostname or '').lower()
+        limit = self._host_limit(host)
+        breaker = self._breaker(host)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.request_budget
+        for attempt in range(self.max_retries + 1):
+            if breaker.blocked():
+                return self._reject(host, url)
+            await self._host_limiter.acquire(host)
+            error = None
+            status = None
+            async with self._global_sem, limit:
+                # Yarım açık devrenin tek deneme hakkı, sıra beklendikten sonra alınır
+                if not breaker.allow():
+                    return self._reject(host, url)
+                timeout = min(self.total_timeout, deadline - loop.time())
+                started = loop.time()
+                try:
+                    result, status = await asyncio.wait_for(send(), timeout=max(0.1, timeout))
+                except asyncio.TimeoutError:
+                    error = f"zaman aşımı ({timeout:.1f}s)"
+                except CurlError as e:
+                    error = str(e)[:120]
+                except BaseException:
+                    # İptal (aşama timeout'u, kapanış) veya beklenmeyen hata: sonuç yok, deneme hakkı geri verilir
+                    breaker.release()
+                    raise
+            if error is None and status == 200:
+                limit.on_success(loop.time() - started)
+                breaker.record_success()
+                return result
+            if error is None and status != 429 and status < 500:
+                # Host cevap veriyor, sadece bu sayfa yok/erişilemez (404, 403 vb.) - tekrar denenmez
+                breaker.record_success()
+                logger.warning(f"⚠️ Link HTTP {status}: {url[:80]}")
+                return {}
+            limit.on_failure()
+            breaker.record_failure()
+            reason = error or f"HTTP {status}"
+            # Full jitter: 0 ile base * 2^deneme arasında rastgele bekle
+            delay = random.uniform(0, self.retry_base_delay * 2 ** attempt)
+            # Beklemeden sonra bağlantı kuracak kadar süre kalmıyorsa tekrar denenmez
+            if attempt < self.max_retries and deadline - loop.time() - delay >= self.connect_timeout:
+                self.retries += 1
+                step_log.info("🔁 %s, %.1fs sonra tekrar denenecek (%d/%d): %.80s", reason, delay, attempt + 1, self.max_retries, url)
+                await asyncio.sleep(delay)
+            else:
+                logger.warning(f"⏱️ Link alınamadı ({reason}): {url[:80]}")
+                break
+        return {}
+
+    def _reject(self, host: str, url: str) -> dict:
+        self.rejected += 1
+        logger.warning(f"🚫 {host} devre kesici açık, istek gönderilmedi: {url[:80]}")
+        return {}
+
+    async def _read_full(self, url: str):
+        response = await self._session.get(
+            url,
+            timeout=(self.connect_timeout, self.read_timeout),
+            allow_redirects=True,
+        )
+        if response.status_code != 200:
+            return {}, response.status_code
+        return {'html': response.text, 'final_url': str(response.url)}, 200
+
+    async def _read_stream(self, url: str, on_chunk, max_bytes: int):
+        response = await self._session.get(
+            url,
+            timeout=(self.connect_timeout, self.read_timeout),
+            allow_redirects=True,
+            stream=True,
+        )
+        try:
+            if response.status_code != 200:
+                return {}, response.status_code
+            match = _CHARSET_RE.search(response.headers.get('content-type', ''))
+            try:
+                decoder = codecs.getincrementaldecoder(match.group(1) if match else 'utf-8')(errors='replace')
+            except LookupError:
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            bytes_read = 0
+            stopped_early = False
+            async for chunk in response.aiter_content():
+                bytes_read += len(chunk)
+                if on_chunk(decoder.decode(chunk)):
+                    stopped_early = True
+                    break
+                if bytes_read >= max_bytes:
+                    break
+            return {'final_url': str(response.url), 'bytes_read': bytes_read, 'stopped_early': stopped_early}, 200
+        finally:
+            await response.aclose()
+
+    def host_states(self) -> dict:
+        """Host başına güncel eşzamanlılık sınırı ve devre kesici durumu"""
+        return {
+            host: {
+                'limit': self._host_limits[host].limit,
+                'latency_ms': round((self._host_limits[host].latency_ewma or 0) * 1000),
+                'in_flight': self._host_limits[host].in_flight,
+                'breaker': breaker.state,
+                'failures': breaker.failures,
+                'opens': breaker.opens,
+            }
+            for host, breaker in self._breakers.items()
+        }
+
+    def stats(self) -> dict:
+        return {
+            'retries': self.retries,
+            'rejected': self.rejected,
+            'open_breakers': [h for h, b in self._breakers.items() if b.state != CircuitBreaker.CLOSED],
+            'rate_limit': self._host_limiter.stats(),
+        }
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,101 @@
+import asyncio
+import io
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from log_setup import STEP_LOGGER_NAME
+
+logger = logging.getLogger("TelegramDealBot")
+step_log = logging.getLogger(STEP_LOGGER_NAME)
+
+# Pillow opsiyonel: yoksa görsel olduğu gibi gönderilir
+try:
+    from PIL import Image, ImageFilter, ImageOps
+except ImportError:
+    Image = None
+
+# Kenar piksellerinin bu eşikten parlak olanları "yazı/kenar" sayılır
+_EDGE_THRESHOLD = 40
+# Kırpma alanı en az bu oranda küçültmüyorsa kırpılmaz
+_MIN_CROP_GAIN = 0.15
+_CROP_MARGIN = 0.03
+
+
+class ImagePreprocessor:
+    """OCR için görseli event loop dışında (thread pool) küçültüp JPEG'e sıkıştırır.
+
+    En uzun kenar max_side'a indirilir, istenirse kenar yoğunluğuna göre
+    yazı içeren bölge dışındaki boş kenarlar kırpılır. Sonuç orijinalden
+    büyükse orijinal kullanılır.
+    """
+
+    def __init__(self, max_side: int = 1600, jpeg_quality: int = 85, crop_text: bool = False, max_workers: int = 2):
+        self.max_side = max_side
+        self.jpeg_quality = jpeg_quality
+        self.crop_text = crop_text
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-prep')
+        self.images = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.total_ms = 0.0
+
+    async def prepare(self, image_bytes: bytes) -> dict:
+        """Gemini'ye gönderilecek {'mime_type', 'data'} parçasını hazırla"""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            data, mime_type = await loop.run_in_executor(self._executor, self._process, image_bytes)
+        except Exception as e:
+            logger.warning(f"⚠️ Görsel ön işleme hatası, orijinal gönderiliyor: {e}")
+            data, mime_type = image_bytes, 'image/jpeg'
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.images += 1
+        self.bytes_in += len(image_bytes)
+        self.bytes_out += len(data)
+        self.total_ms += elapsed_ms
+        step_log.info("🖼️ Görsel hazırlandı: %d KB -> %d KB (%.0f ms)", len(image_bytes) // 1024, len(data) // 1024, elapsed_ms)
+        return {'mime_type': mime_type, 'data': data}
+
+    def _process(self, image_bytes: bytes):
+        if Image is None:
+            return image_bytes, 'image/jpeg'
+        image = Image.open(io.BytesIO(image_bytes))
+        original_mime = Image.MIME.get(image.format, 'image/jpeg')
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        if self.crop_text:
+            image = self._crop_to_text(image)
+        image.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, format='JPEG', quality=self.jpeg_quality, optimize=True)
+        data = out.getvalue()
+        if len(data) >= len(image_bytes):
+            return image_bytes, original_mime
+        return data, 'image/jpeg'
+
+    def _crop_to_text(self, image):
+        """Kenar (yazı) yoğunluğu olan bölgenin dışındaki düz arka planı kırp"""
+        width, height = image.size
+        edges = image.convert('L').filter(ImageFilter.FIND_EDGES)
+        # Filtre görüntünün en dış pikselinde yapay kenar üretir, 1 px içeriden bakılır
+        edges = edges.crop((1, 1, width - 1, height - 1))
+        bbox = edges.point(lambda p: 255 if p > _EDGE_THRESHOLD else 0).getbbox()
+        if not bbox:
+            return image
+        left, top, right, bottom = (v + 1 for v in bbox)
+        if (right - left) * (bottom - top) > (1 - _MIN_CROP_GAIN) * width * height:
+            return image
+        mx, my = int(width * _CROP_MARGIN), int(height * _CROP_MARGIN)
+        return image.crop((max(0, left - mx), max(0, top - my), min(width, right + mx), min(height, bottom + my)))
+
+    def stats(self) -> dict:
+        return {
+            'images': self.images,
+            'bytes_saved': self.bytes_in - self.bytes_out,
+            'avg_ms': round(self.total_ms / self.images, 1) if self.images else 0.0,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
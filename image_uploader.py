@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger("TelegramDealBot")
+
+IMGBB_UPLOAD_URL = 'https://api.imgbb.com/1/upload'
+
+
+class ImgbbUploader:
+    """imgbb'ye görsel yükleyen, tek bir aiohttp session'ı paylaşan istemci.
+
+    Görsel base64'e çevrilmeden ham bayt olarak multipart dosya alanında
+    gönderilir. Session ilk yüklemede (event loop içinde) oluşturulur.
+    """
+
+    def __init__(self, api_key: str, timeout: float = 30.0, max_connections: int = 8):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._session = None
+        self.uploads = 0
+        self.failures = 0
+        self.bytes_sent = 0
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+            )
+        return self._session
+
+    async def upload(self, image_bytes: bytes, filename: str = 'photo.jpg',
+                     content_type: str = 'image/jpeg') -> Optional[str]:
+        """Görseli yükle, başarılıysa görselin URL'ini döndür, değilse None"""
+        session = self._ensure_session()
+        data = aiohttp.FormData()
+        data.add_field('key', self.api_key)
+        data.add_field('image', image_bytes, filename=filename, content_type=content_type)
+        try:
+            async with session.post(IMGBB_UPLOAD_URL, data=data) as resp:
+                if resp.status != 200:
+                    self.failures += 1
+                    logger.warning(f"⚠️ imgbb upload HTTP {resp.status}")
+                    return None
+                result = await resp.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.failures += 1
+            logger.warning(f"⚠️ imgbb upload hatası: {e}")
+            return None
+        if not result.get('success'):
+            self.failures += 1
+            logger.warning(f"⚠️ imgbb upload başarısız: {str(result)[:200]}")
+            return None
+        self.uploads += 1
+        self.bytes_sent += len(image_bytes)
+        return result['data']['url']
+
+    def stats(self) -> dict:
+        return {
+            'uploads': self.uploads,
+            'failures': self.failures,
+            'bytes_sent': self.bytes_sent,
+        }
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
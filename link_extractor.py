@@ -0,0 +1,69 @@
+import re
+from typing import List
+from urllib.parse import urlparse
+
+from telethon.tl import types
+
+# Entity ve buton yoksa düz metinde aranan URL kalıbı (modül yüklenirken bir kez derlenir)
+URL_RE = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+
+# Telegram içi linkler (kanal/davet linkleri) ürün linki sayılmaz
+_TELEGRAM_HOSTS = frozenset({'t.me', 'telegram.me', 'telegram.dog'})
+
+_BUTTON_TYPES = (types.KeyboardButtonUrl, types.KeyboardButtonUrlAuth)
+
+
+def _normalize(url: str) -> str:
+    url = url.strip()
+    if '://' not in url:
+        # MessageEntityUrl şemasız olabilir ("amzn.to/abc")
+        url = f"https://{url}"
+    return url
+
+
+def _is_product_link(url: str) -> bool:
+    host = (urlparse(url).hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return bool(host) and host not in _TELEGRAM_HOSTS
+
+
+def _append(links: List[str], seen: set, url: str):
+    url = _normalize(url)
+    if url not in seen and _is_product_link(url):
+        seen.add(url)
+        links.append(url)
+
+
+def extract_links_from_text(text: str) -> List[str]:
+    """Düz metindeki linkleri sırasıyla (tekrarsız) döndür"""
+    links = []
+    seen = set()
+    for url in URL_RE.findall(text or ''):
+        _append(links, seen, url)
+    return links
+
+
+def extract_links(message) -> List[str]:
+    """Telegram mesajındaki ürün linklerini metindeki sırasıyla döndür.
+
+    Önce mesaj entity'leri (görünen URL'ler ve metne gömülü MessageEntityTextUrl
+    linkleri), ardından inline butonların URL'leri okunur. Hiçbiri yoksa metin
+    derlenmiş URL kalıbıyla taranır. Telegram içi linkler atlanır.
+    """
+    links = []
+    seen = set()
+    for entity, inner_text in message.get_entities_text():
+        if isinstance(entity, types.MessageEntityTextUrl):
+            _append(links, seen, entity.url)
+        elif isinstance(entity, types.MessageEntityUrl):
+            _append(links, seen, inner_text)
+    markup = message.reply_markup
+    if isinstance(markup, types.ReplyInlineMarkup):
+        for row in markup.rows:
+            for button in row.buttons:
+                if isinstance(button, _BUTTON_TYPES):
+                    _append(links, seen, button.url)
+    if links:
+        return links
+    return extract_links_from_text(message.message)
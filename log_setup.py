@@ -0,0 +1,150 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import uuid
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# İşlenen deal'in izleme ID'si ve aşama süreleri; asyncio task'ları context'i kopyaladığı için
+# deal içinde açılan alt task'lar (sayfa, AI, yükleme) aynı değerleri görür
+_trace_id = contextvars.ContextVar('trace_id', default='-')
+_stage_timings = contextvars.ContextVar('stage_timings', default=None)
+
+STEP_LOGGER_NAME = "TelegramDealBot.steps"
+
+CONSOLE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s'
+_EXC_FORMATTER = logging.Formatter()
+
+
+def begin_trace(trace_id: str = None):
+    """Yeni deal izini başlat; end_trace'e verilecek token'ları döndür"""
+    trace_id = trace_id or uuid.uuid4().hex[:12]
+    return _trace_id.set(trace_id), _stage_timings.set({})
+
+
+def end_trace(tokens):
+    trace_token, timings_token = tokens
+    _trace_id.reset(trace_token)
+    _stage_timings.reset(timings_token)
+
+
+def record_stage(stage: str, seconds: float):
+    """Aktif deal'in aşama süresini kaydet (deal izi yoksa bir şey yapmaz)"""
+    timings = _stage_timings.get()
+    if timings is not None:
+        timings[stage] = round(timings.get(stage, 0.0) + seconds * 1000, 1)
+
+
+def stage_timings() -> dict:
+    return dict(_stage_timings.get() or {})
+
+
+class TraceFilter(logging.Filter):
+    """Kaydı oluşturan context'teki izleme ID'sini record.trace_id'ye ekler"""
+
+    def filter(self, record):
+        record.trace_id = _trace_id.get()
+        return True
+
+
+class StepSampler(logging.Filter):
+    """Adım loglarının rate oranını geçirir; WARNING ve üstü her zaman geçer.
+
+    Karar izleme ID'sinden türetildiği için bir deal'in adımlarının ya hepsi
+    ya hiçbiri loglanır, seçilen deal'ler baştan sona izlenebilir.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.threshold = int(max(0.0, min(1.0, rate)) * 10000)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.threshold >= 10000:
+            return True
+        trace_id = _trace_id.get()
+        if trace_id == '-':
+            # Deal dışındaki adımlar (handler) rastgele örneklenir
+            return random.random() * 10000 < self.threshold
+        return zlib.crc32(trace_id.encode()) % 10000 < self.threshold
+
+
+class JsonFormatter(logging.Formatter):
+    """Her kaydı tek satır JSON olarak yazar (trace, aşama ve süre alanlarıyla)"""
+
+    _EXTRA_FIELDS = ('stage', 'duration_ms', 'stages', 'chat', 'message_id')
+
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'trace': getattr(record, 'trace_id', '-'),
+            'msg': record.getMessage(),
+        }
+        for field in self._EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Mesajı argümanlarıyla birleştirip kuyruğa atar; formatter ve dosya/konsol yazımı listener thread'inde yapılır.
+
+    Argümanlar burada metne çevrilir: çağıran dict/list'i loglayıp hemen
+    değiştirirse log o anki hali gösterir ve listener thread'i event loop'un
+    değiştirdiği nesneye dokunmaz. İstisna da burada exc_text'e çevrilir.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(log_file: str = 'logs/bot.log', level: str = 'INFO', json_file: bool = True,
+                  step_level: str = 'INFO', step_sample: float = 1.0) -> QueueListener:
+    """Kök logger'ı kuyruğa yazacak şekilde ayarla; dosya/konsol yazımı ayrı thread'de yapılır.
+
+    Listener çıkışta (atexit) durdurulur, kuyrukta kalan kayıtlar yazılır.
+    """
+    if os.path.dirname(log_file):
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler.setFormatter(JsonFormatter() if json_file else logging.Formatter(CONSOLE_FORMAT))
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(TraceFilter())
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    steps = logging.getLogger(STEP_LOGGER_NAME)
+    steps.setLevel(step_level)
+    if step_sample < 1.0:
+        steps.addFilter(StepSampler(step_sample))
+
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    # Çıkışta kuyrukta kalan kayıtlar da yazılsın
+    atexit.register(listener.stop)
+    return listener
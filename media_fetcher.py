@@ -0,0 +1,139 @@
+import io
+import logging
+import time
+from collections import deque
+from typing import Dict, Iterable
+
+from telethon.tl import types
+
+from log_setup import STEP_LOGGER_NAME
+
+logger = logging.getLogger("TelegramDealBot")
+step_log = logging.getLogger(STEP_LOGGER_NAME)
+
+# Amaç başına hedef çözünürlük (en uzun kenar, px)
+DEFAULT_TARGETS = {'ocr': 1280, 'upload': 1280, 'thumbnail': 320}
+
+
+def _size_side(size) -> int:
+    return max(getattr(size, 'w', 0), getattr(size, 'h', 0))
+
+
+def _size_bytes(size) -> int:
+    if isinstance(size, types.PhotoSizeProgressive):
+        return max(size.sizes) if size.sizes else 0
+    if isinstance(size, types.PhotoCachedSize):
+        return len(size.bytes)
+    return getattr(size, 'size', 0)
+
+
+def select_photo_size(photo, target_side: int):
+    """Hedef kenar uzunluğunu karşılayan en küçük boyutu seç; hiçbiri yetmiyorsa en büyüğü.
+
+    Stripped/path boyutları (bulanık önizleme, SVG yolu) ve boş boyutlar atlanır.
+    """
+    sizes = [
+        s for s in (photo.sizes or [])
+        if isinstance(s, (types.PhotoSize, types.PhotoSizeProgressive, types.PhotoCachedSize))
+    ]
+    if not sizes:
+        return None
+    sizes.sort(key=lambda s: (_size_side(s), _size_bytes(s)))
+    for size in sizes:
+        if _size_side(size) >= target_side:
+            return size
+    return sizes[-1]
+
+
+class TelegramMediaFetcher:
+    """Telegram fotoğrafını amaca göre (OCR, yükleme, küçük görsel) uygun boyutta indirir.
+
+    Her amaç için hedefi karşılayan en küçük foto boyutu seçilir; aynı boyutu
+    seçen amaçlar tek indirmeyi paylaşır. İndirme, yeniden kullanılan BytesIO
+    tamponlarına parça parça yazılır. rate_limiter verilirse her indirme
+    öncesi token alınır.
+    """
+
+    def __init__(self, targets: Dict[str, int] = None, rate_limiter=None, max_buffers: int = 4):
+        self.targets = dict(DEFAULT_TARGETS)
+        if targets:
+            self.targets.update(targets)
+        self.rate_limiter = rate_limiter
+        self.max_buffers = max_buffers
+        self._buffers = deque()
+        self.photos = 0
+        self.downloads = 0
+        self.bytes_downloaded = 0
+        self.bytes_skipped = 0
+        self.total_seconds = 0.0
+
+    def _take_buffer(self) -> io.BytesIO:
+        buffer = self._buffers.pop() if self._buffers else io.BytesIO()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return buffer
+
+    def _give_buffer(self, buffer: io.BytesIO):
+        if len(self._buffers) < self.max_buffers:
+            self._buffers.append(buffer)
+
+    async def download(self, client, photo, purposes: Iterable[str]) -> Dict:
+        """Fotoğrafı istenen amaçlar için indir.
+
+        {'images': {amaç: bytes}, 'bytes': indirilen toplam bayt, 'seconds': süre} döndürür;
+        indirilemeyen amaçlar images'ta yer almaz.
+        """
+        started = time.perf_counter()
+        by_type = {}
+        images = {}
+        downloaded = 0
+        largest = max((_size_bytes(s) for s in (photo.sizes or [])), default=0)
+        for purpose in purposes:
+            size = select_photo_size(photo, self.targets.get(purpose, self.targets['ocr']))
+            if size is None:
+                continue
+            if size.type not in by_type:
+                by_type[size.type] = await self._download_size(client, photo, size)
+                if by_type[size.type]:
+                    downloaded += len(by_type[size.type])
+                    self.bytes_skipped += max(0, largest - len(by_type[size.type]))
+                    step_log.info(
+                        "📸 Fotoğraf boyutu '%s' (%sx%s) indirildi: %d KB (en büyük %d KB)",
+                        size.type, size.w, size.h, len(by_type[size.type]) // 1024, largest // 1024,
+                    )
+            if by_type[size.type]:
+                images[purpose] = by_type[size.type]
+        elapsed = time.perf_counter() - started
+        self.photos += 1
+        self.total_seconds += elapsed
+        self.bytes_downloaded += downloaded
+        return {'images': images, 'bytes': downloaded, 'seconds': elapsed}
+
+    async def _download_size(self, client, photo, size) -> bytes:
+        if isinstance(size, types.PhotoCachedSize):
+            # Küçük boyutlar mesajla birlikte gelir, ağ isteği gerekmez
+            return size.bytes
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        buffer = self._take_buffer()
+        try:
+            # thumb boyut tipiyle ('y', 'x') verilir; Telethon PhotoSizeProgressive nesnesini
+            # tanımıyor ve hiçbir şey yazmadan dönüyor
+            await client.download_media(photo, file=buffer, thumb=size.type)
+            data = buffer.getvalue()
+            if not data:
+                logger.warning(f"⚠️ Fotoğraf boyutu '{size.type}' indirilemedi (boş içerik)")
+                return b''
+            self.downloads += 1
+            return data
+        finally:
+            self._give_buffer(buffer)
+
+    def stats(self) -> dict:
+        return {
+            'photos': self.photos,
+            'downloads': self.downloads,
+            'bytes_downloaded': self.bytes_downloaded,
+            'bytes_skipped': self.bytes_skipped,
+            'avg_seconds': round(self.total_seconds / self.photos, 2) if self.photos else 0.0,
+        }
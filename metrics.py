@@ -0,0 +1,168 @@
+import bisect
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from aiohttp import web
+
+from log_setup import record_stage
+
+logger = logging.getLogger("TelegramDealBot")
+
+# Aşama süreleri için histogram sınırları (saniye)
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _number(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class Metrics:
+    """Prometheus metin formatında sayaç, gauge ve aşama süresi histogramları.
+
+    Aşamalar track() ile ölçülür: süre {prefix}_stage_seconds histogramına,
+    istisnalar {prefix}_stage_errors_total sayacına yazılır. Gauge'lar her
+    scrape'te verilen fonksiyon çağrılarak okunur, ayrıca güncellenmeleri
+    gerekmez.
+    """
+
+    def __init__(self, prefix: str = 'dealbot', buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self._histograms = {}
+        self._counters = defaultdict(float)
+        self._help = {}
+        self._gauges = []
+
+    @contextmanager
+    def track(self, stage: str):
+        """Bloğun süresini ölç; istisna çıkarsa hata say. İptal (CancelledError) ölçülmez."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.error(stage)
+            self.observe(stage, time.perf_counter() - started)
+            raise
+        self.observe(stage, time.perf_counter() - started)
+
+    def register(self, *stages: str):
+        """Aşama histogramlarını ilk ölçümden önce sıfır değerle yayınla"""
+        for stage in stages:
+            if stage not in self._histograms:
+                self._histograms[stage] = _Histogram(self.buckets)
+
+    def observe(self, stage: str, seconds: float):
+        record_stage(stage, seconds)
+        self.register(stage)
+        self._histograms[stage].observe(seconds)
+
+    def error(self, stage: str):
+        self.inc('stage_errors_total', stage=stage)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        self._counters[(name, tuple(sorted(labels.items())))] += amount
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def gauge(self, name: str, help_text: str, fn, label: str = None, kind: str = 'gauge'):
+        """fn() sayı döndürür; label verilirse {etiket_değeri: sayı} sözlüğü döndürür"""
+        self._gauges.append((name, help_text, fn, label, kind))
+
+    def render(self) -> str:
+        lines = []
+        stage_name = f'{self.prefix}_stage_seconds'
+        lines.append(f'# HELP {stage_name} İşleme aşamalarının süresi (saniye)')
+        lines.append(f'# TYPE {stage_name} histogram')
+        for stage, histogram in sorted(self._histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{stage_name}_bucket{_labels({"stage": stage, "le": _number(float(bound))})} {cumulative}')
+            lines.append(f'{stage_name}_bucket{_labels({"stage": stage, "le": "+Inf"})} {histogram.count}')
+            lines.append(f'{stage_name}_sum{_labels({"stage": stage})} {_number(histogram.total)}')
+            lines.append(f'{stage_name}_count{_labels({"stage": stage})} {histogram.count}')
+
+        by_name = defaultdict(list)
+        for (name, labels), value in self._counters.items():
+            by_name[name].append((dict(labels), value))
+        for name in sorted(by_name):
+            full_name = f'{self.prefix}_{name}'
+            if name in self._help:
+                lines.append(f'# HELP {full_name} {self._help[name]}')
+            lines.append(f'# TYPE {full_name} counter')
+            for labels, value in sorted(by_name[name], key=lambda item: sorted(item[0].items())):
+                lines.append(f'{full_name}{_labels(labels)} {_number(value)}')
+
+        for name, help_text, fn, label, kind in self._gauges:
+            try:
+                value = fn()
+            except Exception as e:
+                logger.debug(f"Metrik okunamadı ({name}): {e}")
+                continue
+            full_name = f'{self.prefix}_{name}'
+            lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} {kind}')
+            if label is None:
+                lines.append(f'{full_name} {_number(value)}')
+            else:
+                for label_value, v in value.items():
+                    lines.append(f'{full_name}{_labels({label: label_value})} {_number(v)}')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Metrics'i GET /metrics üzerinden sunan küçük aiohttp sunucusu"""
+
+    def __init__(self, metrics: Metrics, host: str = '127.0.0.1', port: int = 9108):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"📈 Metrikler http://{self.host}:{self.port}/metrics adresinde")
+
+    async def _handle(self, request):
+        return web.Response(body=self.metrics.render().encode('utf-8'), headers={'Content-Type': CONTENT_TYPE})
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger("TelegramDealBot")
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    raise TypeError(f"JSON'a çevrilemeyen tip: {type(value).__name__}")
+
+
+def _decode(obj: dict):
+    if len(obj) == 1 and '$datetime' in obj:
+        return datetime.fromisoformat(obj['$datetime'])
+    return obj
+
+
+class Outbox:
+    """Firestore'a yazılacak kayıtların SQLite (WAL) üzerindeki kalıcı kuyruğu.
+
+    Kayıt yazma kuyruğuna girmeden önce buraya eklenir, Firestore commit'i
+    başarılı olunca silinir. Process çökse bile kalan kayıtlar bir sonraki
+    açılışta tekrar gönderilir; doc_id sabit olduğu için tekrar yazmak aynı
+    dokümanın üzerine yazar.
+
+    Aynı doc_id tekrar eklenirse satırın version'ı artar; remove() ve
+    mark_failed() sadece verilen version'a dokunur. Böylece eski verinin
+    yazılması bitince yeni veri outbox'tan silinmez.
+
+    Yazılamayan kayıt her denemede daha geç (retry_delay * 2^deneme, en fazla
+    max_retry_delay) tekrar verilir; max_attempts denemeden sonra pending()
+    onu döndürmez, kayıt incelenmek üzere tabloda kalır.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 10, retry_delay: float = 30.0,
+                 max_retry_delay: float = 3600.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "doc_id TEXT PRIMARY KEY, data TEXT NOT NULL, "
+            "created_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL DEFAULT 0, version INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(outbox)")}
+        if 'next_attempt_at' not in columns:
+            self._db.execute("ALTER TABLE outbox ADD COLUMN next_attempt_at REAL NOT NULL DEFAULT 0")
+        if 'version' not in columns:
+            self._db.execute("ALTER TABLE outbox ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_created ON outbox(created_at)")
+        self._db.commit()
+
+    def add(self, doc_id: str, data: dict) -> int:
+        """Kaydı ekle veya yenisiyle değiştir, satırın yeni version'ını döndür"""
+        self._db.execute(
+            "INSERT INTO outbox (doc_id, data, created_at, attempts, next_attempt_at, version) "
+            "VALUES (?, ?, ?, 0, 0, 0) ON CONFLICT(doc_id) DO UPDATE SET data = excluded.data, "
+            "created_at = excluded.created_at, attempts = 0, next_attempt_at = 0, "
+            "version = outbox.version + 1",
+            (doc_id, json.dumps(data, ensure_ascii=False, default=_encode), time.time()),
+        )
+        self._db.commit()
+        return self._version(doc_id)
+
+    def _version(self, doc_id: str) -> Optional[int]:
+        row = self._db.execute("SELECT version FROM outbox WHERE doc_id = ?", (doc_id,)).fetchone()
+        return row[0] if row else None
+
+    def remove(self, entries: List[Tuple[str, int]]):
+        """(doc_id, version) kayıtlarını sil; bu arada yeni version eklendiyse satır kalır"""
+        self._db.executemany("DELETE FROM outbox WHERE doc_id = ? AND version = ?", entries)
+        self._db.commit()
+
+    def mark_failed(self, entries: List[Tuple[str, int]]):
+        """Deneme sayısını artır, bir sonraki denemeyi ertele; deneme hakkı biten kayıtları logla"""
+        now = time.time()
+        for doc_id, version in entries:
+            row = self._db.execute(
+                "SELECT attempts FROM outbox WHERE doc_id = ? AND version = ?", (doc_id, version)
+            ).fetchone()
+            if row is None:
+                continue
+            attempts = row[0] + 1
+            delay = min(self.max_retry_delay, self.retry_delay * 2 ** (attempts - 1))
+            self._db.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ? WHERE doc_id = ? AND version = ?",
+                (attempts, now + delay, doc_id, version),
+            )
+            if attempts >= self.max_attempts:
+                logger.error(f"❌ Outbox kaydı {attempts} denemede yazılamadı, tekrar gönderilmeyecek: {doc_id}")
+        self._db.commit()
+
+    def pending(self, limit: int = 100) -> List[Tuple[str, dict, int]]:
+        """Zamanı gelmiş, deneme hakkı bitmemiş en eski kayıtları (doc_id, data, version) olarak döndür"""
+        rows = self._db.execute(
+            "SELECT doc_id, data, version FROM outbox WHERE attempts < ? AND next_attempt_at <= ? "
+            "ORDER BY created_at LIMIT ?",
+            (self.max_attempts, time.time(), limit),
+        ).fetchall()
+        items = []
+        for doc_id, raw, version in rows:
+            try:
+                items.append((doc_id, json.loads(raw, object_hook=_decode), version))
+            except ValueError as e:
+                logger.error(f"❌ Outbox kaydı okunamadı, siliniyor ({doc_id}): {e}")
+                self.remove([(doc_id, version)])
+        return items
+
+    def count(self) -> int:
+        """Gönderilmeyi bekleyen (deneme hakkı bitmemiş) kayıt sayısı"""
+        return self._db.execute(
+            "SELECT COUNT(*) FROM outbox WHERE attempts < ?", (self.max_attempts,)
+        ).fetchone()[0]
+
+    def dead_count(self) -> int:
+        """Deneme hakkı bitmiş, elle incelenmesi gereken kayıt sayısı"""
+        return self._db.execute(
+            "SELECT COUNT(*) FROM outbox WHERE attempts >= ?", (self.max_attempts,)
+        ).fetchone()[0]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
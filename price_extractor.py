@@ -0,0 +1,135 @@
+import re
+from typing import List, NamedTuple
+
+# Bot ve test scriptlerinin ortak fiyat çıkarma modülü. Metin önceden derlenmiş
+# regex ile bir kez taranır; en düşük öncelik numaralı, en öndeki aday seçilir.
+
+MIN_PRICE = 1.0
+MAX_PRICE = 10_000_000.0
+
+# Sayı: 950 / 1.234 / 1.234,56 / 39,999.90 / 9.99
+_NUM = r'\d+(?:[.,]\d+)*'
+
+# Ana tarama rakamla başlar; harf veya link karakterinden sonra gelen sayılar
+# (B0CHX3, tag=firsat-21) atlanır. Anahtar kelime ve ön para birimi, eşleşmenin
+# hemen öncesindeki kısa dilimde aranır.
+_PRICE_RE = re.compile(r'(?<![\w.,/=\-?&#%+])(' + _NUM + r')(?:\s*(TL|₺|TRY|lira)(?![^\W\d_]|\d))?', re.IGNORECASE)
+_PREFIX_RE = re.compile(
+    r"""
+    (?:\b
+        (?:(?P<old>normal\s+fiyat[ıi]?|eski\s+fiyat[ıi]?|liste\s+fiyat[ıi]?|piyasa(?:\s+fiyat[ıi]?)?)
+          | (?P<drop>yerine|düşen|dusen|düştü|dustu)
+          | (?P<kw>sadece|fiyat[ıi]?|tutar[ıi]?)
+        )\s*:?\s*
+    )?
+    (?P<pre>(?<![^\W\d_])(?:₺|TL|TRY)\s*)?
+    $""",
+    re.IGNORECASE | re.VERBOSE,
+)
+# Fiyat değil indirim/kupon tutarı olduğunu gösteren ekler ("150 TL indirim")
+_DISCOUNT_RE = re.compile(r'\s*(?:indirim|kupon|değerinde|degerinde|puan|taksit)', re.IGNORECASE)
+_NUM_RE = re.compile(_NUM)
+# Anahtar kelimenin sayıdan en fazla bu kadar karakter önce olabileceği dilim
+_PREFIX_WINDOW = 24
+# Sayıdan önceki son kelime bunlardan biriyle başlamıyorsa _PREFIX_RE hiç çalıştırılmaz
+_PREFIX_HINTS = ('₺', 'tl', 'try', 'yerine', 'düş', 'dus', 'sadece', 'fiyat', 'tutar', 'piyasa')
+
+# Aday türleri ve öncelikleri (düşük = daha güvenilir)
+PRIORITY_DROP = 0      # "X TL yerine 49,90 TL" -> indirimli fiyat
+PRIORITY_KEYWORD = 1   # "Sadece 9.99₺", "Fiyat: 1250 TL"
+PRIORITY_CURRENCY = 2  # "64.999 TL", "₺950"
+PRIORITY_BARE = 3      # "Fiyat: 1250" (para birimi yok)
+PRIORITY_IGNORED = 9   # eski/piyasa fiyatı, indirim/kupon tutarı
+
+
+class PriceCandidate(NamedTuple):
+    value: float
+    raw: str
+    start: int
+    end: int
+    priority: int
+    kind: str
+
+
+def parse_price(price_str) -> float:
+    """'1.234,56 TL', '39,999.90', '₺950', 1234.5 gibi değerleri float'a çevir"""
+    if price_str is None:
+        return 0.0
+    match = _NUM_RE.search(str(price_str))
+    if not match:
+        return 0.0
+    return _parse_number(match.group(0))
+
+
+def _parse_number(token: str) -> float:
+    last_comma = token.rfind(',')
+    last_dot = token.rfind('.')
+    if last_comma != -1 and last_dot != -1:
+        if last_comma > last_dot:
+            # 1.234,56 -> Türk formatı
+            token = token.replace('.', '').replace(',', '.')
+        else:
+            # 1,234.56 -> ABD formatı
+            token = token.replace(',', '')
+    elif last_comma != -1 or last_dot != -1:
+        sep = ',' if last_comma != -1 else '.'
+        decimals = len(token) - max(last_comma, last_dot) - 1
+        if decimals == 3 or token.count(sep) > 1:
+            # 1.250 / 19,900 / 1.234.567 -> binlik ayırıcı
+            token = token.replace(sep, '')
+        else:
+            # 49,90 / 9.99 / 12,5 -> ondalık
+            token = token.replace(',', '.')
+    try:
+        return float(token)
+    except ValueError:
+        return 0.0
+
+
+def find_price_candidates(text: str) -> List[PriceCandidate]:
+    """Metni tek geçişte tara, tüm fiyat adaylarını konum ve öncelikleriyle döndür"""
+    candidates = []
+    if not text:
+        return candidates
+    for match in _PRICE_RE.finditer(text):
+        start = match.start()
+        raw, currency = match.group(1), match.group(2)
+        prefix = None
+        if start:
+            window_start = max(0, start - _PREFIX_WINDOW)
+            window = text[window_start:start].rstrip(' \t:')
+            last_word = window[max(window.rfind(' '), window.rfind('\n')) + 1:].lower()
+            if last_word.startswith(_PREFIX_HINTS):
+                prefix = _PREFIX_RE.search(text, window_start, start)
+                if prefix is not None and prefix.start() == start:
+                    prefix = None
+        has_currency = bool(currency) or (prefix is not None and prefix.group('pre') is not None)
+        keyword = prefix is not None and prefix.group('kw') is not None
+        if not has_currency and not keyword:
+            continue
+        value = _parse_number(raw)
+        if not (MIN_PRICE <= value <= MAX_PRICE):
+            continue
+        if (prefix is not None and prefix.group('old')) or _DISCOUNT_RE.match(text, match.end()):
+            priority, kind = PRIORITY_IGNORED, 'ignored'
+        elif prefix is not None and prefix.group('drop') and has_currency:
+            priority, kind = PRIORITY_DROP, 'drop'
+        elif keyword:
+            priority, kind = (PRIORITY_KEYWORD, 'keyword') if has_currency else (PRIORITY_BARE, 'bare')
+        else:
+            priority, kind = PRIORITY_CURRENCY, 'currency'
+        candidates.append(PriceCandidate(
+            value, raw, prefix.start() if prefix is not None else start, match.end(), priority, kind
+        ))
+    return candidates
+
+
+def extract_price(text: str) -> float:
+    """Mesajdaki en güvenilir fiyatı döndür, yoksa 0.0"""
+    best = None
+    for candidate in find_price_candidates(text):
+        if candidate.priority == PRIORITY_IGNORED:
+            continue
+        if best is None or candidate.priority < best.priority:
+            best = candidate
+    return best.value if best else 0.0
@@ -0,0 +1,73 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """Saniyede rate token dolan, en fazla capacity token biriktiren kova.
+
+    acquire() token yoksa sıradaki token'ı rezerve edip dolana kadar bekler;
+    böylece bekleyenler geliş sırasıyla ve tam rate hızında geçer. rate <= 0
+    ise sınırlama yapılmaz.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self.acquired = 0
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    async def acquire(self):
+        self.acquired += 1
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens < 0:
+            wait = -self._tokens / self.rate
+            self.waits += 1
+            self.waited_seconds += wait
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        return {
+            'acquired': self.acquired,
+            'waits': self.waits,
+            'waited_seconds': round(self.waited_seconds, 2),
+        }
+
+
+class HostRateLimiter:
+    """Her host için ayrı TokenBucket tutar (en son kullanılan max_hosts host)"""
+
+    def __init__(self, rate: float, capacity: float = 1.0, max_hosts: int = 1000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_hosts = max_hosts
+        self._buckets = OrderedDict()
+
+    def bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.capacity)
+            self._buckets[host] = bucket
+            while len(self._buckets) > self.max_hosts:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(host)
+        return bucket
+
+    async def acquire(self, host: str):
+        await self.bucket(host).acquire()
+
+    def stats(self) -> dict:
+        return {
+            'hosts': len(self._buckets),
+            'waits': sum(b.waits for b in self._buckets.values()),
+            'waited_seconds': round(sum(b.waited_seconds for b in self._buckets.values()), 2),
+        }
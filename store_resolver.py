@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+from functools import lru_cache
+from urllib.parse import urlparse
+
+logger = logging.getLogger("TelegramDealBot")
+
+UNKNOWN_STORE = 'Bilinmeyen'
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stores.json')
+
+# Trie düğümünde mağaza değerinin tutulduğu anahtar (alan adı etiketleriyle çakışmaz)
+_VALUE = '$'
+# Kayıtlı olmayan alan adlarında mağaza adı ikinci seviye etiketten önceki etiketten alınır (x.com.tr -> X)
+_SECOND_LEVEL_LABELS = frozenset({'com', 'net', 'org', 'gen', 'co', 'biz', 'web', 'info'})
+
+
+class StoreResolver:
+    """Host adından mağaza adını bulan, alan adı etiketleri üzerine kurulu sonek trie'si.
+
+    stores: {alan_adı: mağaza} - alt alan adları da eşleşir (m.trendyol.com,
+    www.hepsiburada.com). shorteners: {kısa_link_host'u: mağaza veya None};
+    None genel kısaltıcıdır (bit.ly), mağaza çözümlenmiş linkten belirlenmelidir.
+    Host sonuçları LRU cache'te tutulur.
+    """
+
+    def __init__(self, stores: dict = None, shorteners: dict = None, cache_size: int = 4096):
+        self._root = {}
+        for domain, store in (stores or {}).items():
+            self._insert(domain, store)
+        for domain, store in (shorteners or {}).items():
+            self._insert(domain, store)
+        self.store_for_host = lru_cache(maxsize=cache_size)(self._lookup)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_CONFIG_PATH, cache_size: int = 4096) -> 'StoreResolver':
+        try:
+            with open(path, encoding='utf-8') as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Mağaza listesi yüklenemedi ({path}): {e}")
+            config = {}
+        return cls(config.get('stores'), config.get('shorteners'), cache_size)
+
+    def _insert(self, domain: str, store):
+        node = self._root
+        for label in reversed(domain.lower().strip('.').split('.')):
+            node = node.setdefault(label, {})
+        node[_VALUE] = store
+
+    def _lookup(self, host: str) -> str:
+        labels = host.lower().strip('.').split('.')
+        node = self._root
+        found = False
+        store = None
+        # En uzun eşleşen sonek kazanır (örn. amazon.com.tr, com.tr'den önce)
+        for label in reversed(labels):
+            node = node.get(label)
+            if node is None:
+                break
+            if _VALUE in node:
+                found = True
+                store = node[_VALUE]
+        if found:
+            return store or UNKNOWN_STORE
+        return self._fallback_name(labels)
+
+    @staticmethod
+    def _fallback_name(labels) -> str:
+        labels = [l for l in labels if l]
+        if labels and labels[0] == 'www':
+            labels = labels[1:]
+        if len(labels) < 2 or labels[-1].isdigit():
+            return UNKNOWN_STORE
+        if len(labels) >= 3 and labels[-2] in _SECOND_LEVEL_LABELS:
+            return labels[-3].capitalize()
+        return labels[-2].capitalize()
+
+    def resolve(self, url: str) -> str:
+        """Link'in mağaza adını döndür, bulunamazsa 'Bilinmeyen'"""
+        try:
+            host = urlparse(url).hostname
+        except ValueError:
+            return UNKNOWN_STORE
+        if not host:
+            return UNKNOWN_STORE
+        return self.store_for_host(host)
+
+    def stats(self) -> dict:
+        info = self.store_for_host.cache_info()
+        return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
+
+
+_default_resolver = None
+
+
+def default_resolver() -> StoreResolver:
+    """STORES_CONFIG (yoksa modül yanındaki stores.json) ile bir kez oluşturulan ortak çözücü"""
+    global _default_resolver
+    if _default_resolver is None:
+        _default_resolver = StoreResolver.from_file(os.getenv("STORES_CONFIG", DEFAULT_CONFIG_PATH))
+    return _default_resolver
+
+
+def resolve_store(url: str) -> str:
+    return default_resolver().resolve(url)
@@ -0,0 +1,149 @@
+import json
+import logging
+from dataclasses import dataclass, asdict
+
+from log_setup import STEP_LOGGER_NAME
+
+logger = logging.getLogger("TelegramDealBot")
+step_log = logging.getLogger(STEP_LOGGER_NAME)
+
+# orjson varsa JSON-LD blokları onunla parse edilir (opsiyonel, yoksa standart json)
+try:
+    import orjson
+
+    def _loads(raw):
+        # orjson str alt sınıflarını (bs4 NavigableString) kabul etmiyor
+        return orjson.loads(str(raw))
+except ImportError:
+    _loads = json.loads
+
+# Amazon sayfalarında JSON-LD yok, fiyat DOM'dan okunur
+_AMAZON_PRICE_SELECTORS = [
+    '.priceToPay span.a-offscreen',
+    '.priceToPay',
+    '#corePriceDisplay_desktop_feature_div .a-price-whole',
+    '#apex_desktop .a-price-whole',
+    '#corePrice_feature_div .a-price.priceToPay .a-offscreen',
+]
+_AMAZON_ORIGINAL_SELECTORS = [
+    '.basisPrice span.a-offscreen',
+    '.basisPrice',
+    'span.a-price.a-text-price span.a-offscreen',
+    '.a-text-strike',
+    'span[data-a-strike="true"] span.a-offscreen',
+]
+_AMAZON_MIN_PRICE = 20
+# priceSpecification içinde eski/liste fiyatını gösteren tipler
+_LIST_PRICE_TYPES = ('ListPrice', 'StrikethroughPrice', 'MSRP')
+
+
+@dataclass
+class ProductRecord:
+    """Ürün sayfasından çıkarılan, tüm aşamaların okuduğu tipli kayıt"""
+    image: str = ''
+    title: str = ''
+    price: float = 0.0
+    original_price: float = 0.0
+    availability: str = ''
+    currency: str = ''
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _is_product(node: dict) -> bool:
+    node_type = node.get('@type', '')
+    if isinstance(node_type, list):
+        return 'Product' in node_type
+    return node_type == 'Product'
+
+
+def _iter_nodes(js):
+    """JSON-LD kökünden (liste, @graph) tüm nesneleri sırayla dolaş"""
+    if isinstance(js, list):
+        for item in js:
+            yield from _iter_nodes(item)
+    elif isinstance(js, dict):
+        yield js
+        if isinstance(js.get('@graph'), list):
+            yield from _iter_nodes(js['@graph'])
+
+
+def _first_image(img) -> str:
+    if isinstance(img, list) and img:
+        img = img[0]
+    if isinstance(img, dict):
+        img = img.get('url') or img.get('contentUrl') or ''
+    return img.strip() if isinstance(img, str) else ''
+
+
+def _apply_offers(record: ProductRecord, offers, parse_price):
+    if isinstance(offers, list):
+        offers = next((o for o in offers if isinstance(o, dict)), None)
+    if not isinstance(offers, dict):
+        return
+    if not record.price:
+        price = offers.get('price') or offers.get('lowPrice') or offers.get('highPrice')
+        if price:
+            record.price = parse_price(str(price))
+    if not record.currency and offers.get('priceCurrency'):
+        record.currency = str(offers['priceCurrency'])
+    if not record.availability and offers.get('availability'):
+        # "https://schema.org/InStock" -> "InStock"
+        record.availability = str(offers['availability']).rstrip('/').rsplit('/', 1)[-1]
+    specs = offers.get('priceSpecification') or []
+    if isinstance(specs, dict):
+        specs = [specs]
+    for spec in specs:
+        if not isinstance(spec, dict):
+            continue
+        price_type = str(spec.get('priceType', ''))
+        if not record.original_price and any(t in price_type for t in _LIST_PRICE_TYPES) and spec.get('price'):
+            record.original_price = parse_price(str(spec['price']))
+        elif not record.price and spec.get('price'):
+            record.price = parse_price(str(spec['price']))
+
+
+def parse_json_ld(raw: str, parse_price, record: ProductRecord = None) -> ProductRecord:
+    """Bir ld+json bloğunu bir kez parse edip kayıttaki boş alanları doldur"""
+    if record is None:
+        record = ProductRecord()
+    if not raw:
+        return record
+    try:
+        js = _loads(raw)
+    except ValueError:
+        return record
+    nodes = list(_iter_nodes(js))
+    # Önce Product tipindeki nesneler, sonra offers içeren diğerleri
+    for node in sorted(nodes, key=lambda n: not _is_product(n)):
+        if not record.image:
+            record.image = _first_image(node.get('image', ''))
+        if not record.title and _is_product(node) and isinstance(node.get('name'), str):
+            record.title = node['name'].strip()
+        if 'offers' in node:
+            _apply_offers(record, node['offers'], parse_price)
+    return record
+
+
+def apply_amazon_selectors(record: ProductRecord, soup, parse_price) -> ProductRecord:
+    """Amazon ürün sayfasında indirimli ve orijinal fiyatı DOM seçicilerinden oku"""
+    if not record.price:
+        for selector in _AMAZON_PRICE_SELECTORS:
+            elem = soup.select_one(selector)
+            if elem:
+                price = parse_price(elem.get_text(strip=True))
+                if price >= _AMAZON_MIN_PRICE:
+                    record.price = price
+                    step_log.info("✅ Amazon İndirimli Fiyat Bulundu: %s TL (Selector: %s)", price, selector)
+                    break
+    if not record.original_price:
+        for selector in _AMAZON_ORIGINAL_SELECTORS:
+            elem = soup.select_one(selector)
+            if elem:
+                original = parse_price(elem.get_text(strip=True))
+                if original > record.price and original > _AMAZON_MIN_PRICE:
+                    record.original_price = original
+                    step_log.info("✅ Amazon Orijinal Fiyat Bulundu: %s TL (Selector: %s)", original, selector)
+                    break
+    return record
@@ -3,70 +3,92 @@ import json
 import re
 import asyncio
 import logging
+import time
 from typing import List, Dict
-from urllib.parse import urlparse
 from datetime import datetime, timedelta
 
-import aiohttp
-from bs4 import BeautifulSoup
-from telethon import TelegramClient, events
-from curl_cffi import requests as curl_requests
+from telethon import TelegramClient, events, utils
+from telethon.errors import RPCError
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from deal_queue import DealQueue
+from http_fetcher import AsyncFetcher
+from cache import TwoTierCache, normalize_url
+from dedup import DedupIndex, canonical_product_key, content_key
+from price_extractor import parse_price, extract_price
+from html_meta import StreamingMetaExtractor, extract_html_data
+from ai_batcher import AIBatcher
+from category_classifier import CategoryClassifier
+from firestore_writer import FirestoreWriter
+from outbox import Outbox
+from image_uploader import ImgbbUploader
+from image_prep import ImagePreprocessor
+from rate_limiter import TokenBucket
+from media_fetcher import TelegramMediaFetcher
+from channel_resolver import ChannelResolver
+from link_extractor import extract_links, extract_links_from_text
+from checkpoint import ChannelCheckpoints
+from store_resolver import default_resolver
+from metrics import Metrics, MetricsServer
+from log_setup import STEP_LOGGER_NAME, begin_trace, end_trace, stage_timings, setup_logging
+
 # .env dosyasını yükle
 load_dotenv()
 
-# Logging yapılandırması
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("logs/bot.log", encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger("TelegramDealBot")
+# Deal başına tekrarlanan adım logları - seviye ve örnekleme LOG_STEP_LEVEL / LOG_STEP_SAMPLE ile ayarlanır
+step_log = logging.getLogger(STEP_LOGGER_NAME)
 
 # Firebase Admin başlat
-db = None
-try:
-    import firebase_admin
-    from firebase_admin import credentials, firestore
-    import os as os_check
-    service_account_path = 'serviceAccountKey.json'
-    if os_check.path.exists(service_account_path):
+def connect_firestore(verbose: bool = True):
+    """Firestore istemcisini döndür; serviceAccountKey.json yoksa veya başlatılamazsa None.
+
+    Outbox açıkken bağlantı yoksa yazıcı bunu periyodik olarak (verbose=False) tekrar dener.
+    """
+    log_error = logger.error if verbose else logger.debug
+    try:
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+        service_account_path = 'serviceAccountKey.json'
+        if not os.path.exists(service_account_path):
+            log_error("❌ serviceAccountKey.json bulunamadı! Firebase kayıtları yapılamayacak!")
+            log_error("❌ Lütfen serviceAccountKey.json dosyasını bot klasörüne ekleyin!")
+            return None
         if not firebase_admin._apps:
             cred = credentials.Certificate(service_account_path)
             firebase_admin.initialize_app(cred)
-        db = firestore.client()
+        client = firestore.client()
         logger.info("✅ Firebase bağlantısı kuruldu")
-    else:
-        logger.error("❌ serviceAccountKey.json bulunamadı! Firebase kayıtları yapılamayacak!")
-        logger.error("❌ Lütfen serviceAccountKey.json dosyasını bot klasörüne ekleyin!")
-except Exception as e:
-    logger.error(f"❌ Firebase başlatılamadı: {e}")
-    db = None
+        return client
+    except Exception as e:
+        log_error(f"❌ Firebase başlatılamadı: {e}")
+        return None
+
 
 # Gemini AI Yapılandırması
-try:
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    # Model adlarını sırayla dene - görsel okuması için gemini-1.5-flash öncelikli
-    model_names = ['gemini-1.5-flash', 'gemini-1.5-flash-002', 'gemini-1.5-pro', 'gemini-pro']
-    model = None
-    for model_name in model_names:
-        try:
-            model = genai.GenerativeModel(model_name)
-            logger.info(f"✅ Gemini AI modeli yüklendi: {model_name}")
-            break
-        except Exception as e:
-            logger.warning(f"⚠️ Model {model_name} yüklenemedi: {e}")
-            continue
-    if not model:
+def load_gemini_model():
+    """Model adlarını sırayla dene - görsel okuması için gemini-1.5-flash öncelikli; olmazsa None"""
+    try:
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        model_names = ['gemini-1.5-flash', 'gemini-1.5-flash-002', 'gemini-1.5-pro', 'gemini-pro']
+        for model_name in model_names:
+            try:
+                model = genai.GenerativeModel(model_name)
+                logger.info(f"✅ Gemini AI modeli yüklendi: {model_name}")
+                return model
+            except Exception as e:
+                logger.warning(f"⚠️ Model {model_name} yüklenemedi: {e}")
+                continue
         raise Exception("Hiçbir Gemini modeli yüklenemedi!")
-except Exception as e:
-    logger.error(f"❌ Gemini AI başlatılamadı: {e}")
-    model = None
+    except Exception as e:
+        logger.error(f"❌ Gemini AI başlatılamadı: {e}")
+        return None
+
+
+# Firestore istemcisi ve Gemini modeli main()'de, logging kurulduktan sonra hazırlanır
+db = None
+model = None
 
 class TelegramDealBot:
     def __init__(self):
@@ -76,8 +98,145 @@ class TelegramDealBot:
         raw_channels = os.getenv("SOURCE_CHANNELS") or os.getenv("TELEGRAM_CHANNELS") or ""
         self.channels = [c.strip() for c in raw_channels.split(',') if c.strip()]
         self.client = TelegramClient('user_session', self.api_id, self.api_hash)
-        self.last_message_time = {}  # Rate limiting için
-        self.min_delay_seconds = 3  # Mesajlar arası minimum bekleme süresi (saniye) - Telegram yakalanmaması için artırıldı
+        # Telegram API çağrıları (fotoğraf indirme) için hız sınırı - sabit bekleme yerine token bucket
+        self.telegram_bucket = TokenBucket(
+            rate=float(os.getenv("TELEGRAM_RATE_PER_SECOND", "1")),
+            capacity=float(os.getenv("TELEGRAM_RATE_BURST", "3")),
+        )
+        # Fotoğraf her amaç için yeterli en küçük boyutta indirilir (en uzun kenar, px)
+        self.media_fetcher = TelegramMediaFetcher(
+            targets={
+                'ocr': int(os.getenv("TELEGRAM_PHOTO_OCR_SIDE", "1280")),
+                'upload': int(os.getenv("TELEGRAM_PHOTO_UPLOAD_SIDE", "1280")),
+                'thumbnail': int(os.getenv("TELEGRAM_PHOTO_THUMB_SIDE", "320")),
+            },
+            rate_limiter=self.telegram_bucket,
+        )
+        # İşleme kuyruğu - handler mesajı kuyruğa atıp hemen döner, worker'lar paralel işler
+        self.queue = DealQueue(
+            self._process_and_checkpoint,
+            worker_count=int(os.getenv("WORKER_COUNT", "4")),
+            maxsize=int(os.getenv("QUEUE_MAXSIZE", "500")),
+            preserve_channel_order=os.getenv("PRESERVE_CHANNEL_ORDER", "0") == "1",
+        )
+        # Ürün sayfaları için ortak, bağlantıları açık tutan async HTTP katmanı
+        self.fetcher = AsyncFetcher(
+            max_concurrency=int(os.getenv("HTTP_MAX_CONCURRENCY", "20")),
+            per_host_concurrency=int(os.getenv("HTTP_PER_HOST_CONCURRENCY", "4")),
+            connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", "8")),
+            total_timeout=float(os.getenv("HTTP_TOTAL_TIMEOUT", "10")),
+            host_rate=float(os.getenv("HTTP_HOST_RATE_PER_SECOND", "2")),
+            host_burst=float(os.getenv("HTTP_HOST_RATE_BURST", "4")),
+            per_host_max_concurrency=int(os.getenv("HTTP_PER_HOST_MAX_CONCURRENCY", "16")),
+            max_retries=int(os.getenv("HTTP_MAX_RETRIES", "2")),
+            retry_base_delay=float(os.getenv("HTTP_RETRY_BASE_DELAY", "0.5")),
+            breaker_failures=int(os.getenv("HTTP_BREAKER_FAILURES", "5")),
+            breaker_reset_seconds=float(os.getenv("HTTP_BREAKER_RESET_SECONDS", "60")),
+            # Tekrar denemeler dahil toplam süre; STAGE_TIMEOUT_HTML'den kısa olmalı
+            request_budget=float(os.getenv("HTTP_REQUEST_BUDGET", "25")),
+        )
+        # Sayfayı parça parça okuyup görsel/başlık/fiyat bulununca indirmeyi kes
+        self.html_streaming = os.getenv("HTML_STREAMING", "1") == "1"
+        self.html_max_bytes = int(os.getenv("HTML_MAX_BYTES", "2000000"))
+        # Kalıcı veriler (cache, index vb.) için klasör
+        self.data_dir = os.getenv("DATA_DIR", "data")
+        # Link -> mağaza eşlemesi (STORES_CONFIG ile değiştirilebilir)
+        self.store_resolver = default_resolver()
+        # Aşama süreleri, kuyruk derinliği, cache oranları ve hatalar (Prometheus formatı)
+        self.metrics = Metrics()
+        metrics_port = int(os.getenv("METRICS_PORT", "9108"))
+        self.metrics_server = (
+            MetricsServer(self.metrics, os.getenv("METRICS_HOST", "127.0.0.1"), metrics_port)
+            if metrics_port > 0 else None
+        )
+        # Kanal başına işlenen son mesaj ID'si - açılışta aradaki mesajlar (catch-up) işlenir
+        self.checkpoints = ChannelCheckpoints(os.path.join(self.data_dir, 'checkpoints.sqlite3'))
+        self.catchup_enabled = os.getenv("CATCHUP_ENABLED", "1") == "1"
+        self.catchup_max_messages = int(os.getenv("CATCHUP_MAX_MESSAGES", "200"))
+        self.catchup_concurrency = int(os.getenv("CATCHUP_CONCURRENCY", "4"))
+        # Catch-up sürerken canlı ve catch-up tarafından kuyruğa alınan (peer_id, mesaj_id) çiftleri
+        self._catchup_seen = None
+        # Çözümlenmiş link + sayfa verisi cache'i (aynı link tekrar paylaşılınca ağa çıkılmaz)
+        self.link_cache = TwoTierCache(
+            os.path.join(self.data_dir, 'link_cache.sqlite3'),
+            table='links',
+            ttl_seconds=float(os.getenv("LINK_CACHE_TTL_HOURS", "24")) * 3600,
+            max_memory_items=int(os.getenv("LINK_CACHE_MEMORY_ITEMS", "2000")),
+            max_disk_items=int(os.getenv("LINK_CACHE_DISK_ITEMS", "50000")),
+        )
+        # AI sonuçları içerik adresli kalıcı cache'te (aynı metin+link+görsel tekrar analiz edilmez)
+        self.ai_cache = TwoTierCache(
+            os.path.join(self.data_dir, 'ai_cache.sqlite3'),
+            table='ai_results',
+            ttl_seconds=float(os.getenv("AI_CACHE_TTL_HOURS", "168")) * 3600,
+            max_memory_items=int(os.getenv("AI_CACHE_MEMORY_ITEMS", "1000")),
+            max_disk_items=int(os.getenv("AI_CACHE_DISK_ITEMS", "20000")),
+        )
+        # Kategori kurallarla yüksek güvenle bulunursa (ve fiyat mesajda varsa) Gemini atlanır
+        self.classifier = None
+        if os.getenv("CATEGORY_FASTPATH_ENABLED", "1") == "1":
+            self.classifier = CategoryClassifier(
+                threshold=float(os.getenv("CATEGORY_FASTPATH_THRESHOLD", "0.85")),
+                min_hits=int(os.getenv("CATEGORY_FASTPATH_MIN_HITS", "2")),
+            )
+        self.ai_calls_avoided = 0
+        # Görselsiz AI analizlerini kısa pencerede toplayıp tek istekte gönder
+        self.ai_batcher = None
+        if os.getenv("AI_BATCH_ENABLED", "1") == "1":
+            self.ai_batcher = AIBatcher(
+                self._analyze_batch_with_ai,
+                window_seconds=float(os.getenv("AI_BATCH_WINDOW_MS", "300")) / 1000,
+                max_batch=int(os.getenv("AI_BATCH_MAX", "8")),
+            )
+        # OCR öncesi görsel küçültme/sıkıştırma (thread pool'da)
+        self.image_prep = ImagePreprocessor(
+            max_side=int(os.getenv("IMAGE_MAX_SIDE", "1600")),
+            jpeg_quality=int(os.getenv("IMAGE_JPEG_QUALITY", "85")),
+            crop_text=os.getenv("IMAGE_CROP_TEXT", "0") == "1",
+        )
+        self.ocr_calls = 0
+        self.ocr_seconds = 0.0
+        # process_message aşamalarının timeout'ları (saniye)
+        self.stage_timeouts = {
+            'download': float(os.getenv("STAGE_TIMEOUT_DOWNLOAD", "30")),
+            'upload': float(os.getenv("STAGE_TIMEOUT_UPLOAD", "30")),
+            'html': float(os.getenv("STAGE_TIMEOUT_HTML", "30")),
+            'ai': float(os.getenv("STAGE_TIMEOUT_AI", "60")),
+        }
+        # Telegram fotoğraflarını imgbb'ye yükleyen ortak istemci
+        imgbb_api_key = os.getenv("IMGBB_API_KEY", "")
+        self.uploader = ImgbbUploader(imgbb_api_key) if imgbb_api_key else None
+        # Firestore yazmaları arka planda toplanıp batch olarak yapılır (event loop bloklanmaz).
+        # Outbox açıkken kayıt önce diske yazılır, çökme sonrası açılışta tekrar gönderilir.
+        # Firestore bağlantısı yoksa da deal'ler outbox'ta birikir, bağlantı kurulunca gönderilir.
+        self.writer = None
+        self.outbox = None
+        replay_interval = float(os.getenv("FIRESTORE_REPLAY_SECONDS", "30"))
+        if os.getenv("FIRESTORE_OUTBOX_ENABLED", "1") == "1":
+            self.outbox = Outbox(
+                os.path.join(self.data_dir, 'outbox.sqlite3'),
+                max_attempts=int(os.getenv("FIRESTORE_OUTBOX_MAX_ATTEMPTS", "10")),
+                retry_delay=replay_interval,
+            )
+        if db or self.outbox:
+            self.writer = FirestoreWriter(
+                db,
+                batch_size=int(os.getenv("FIRESTORE_BATCH_SIZE", "20")),
+                flush_interval=float(os.getenv("FIRESTORE_FLUSH_MS", "1000")) / 1000,
+                max_pending=int(os.getenv("FIRESTORE_MAX_PENDING", "1000")),
+                outbox=self.outbox,
+                replay_interval=replay_interval,
+                connect=lambda: connect_firestore(verbose=False),
+                metrics=self.metrics,
+            )
+        # Kanallar arası tekrar eden deal index'i
+        self.dedup = None
+        if os.getenv("DEDUP_ENABLED", "1") == "1":
+            self.dedup = DedupIndex(
+                os.path.join(self.data_dir, 'dedup.sqlite3'),
+                window_hours=float(os.getenv("DEDUP_WINDOW_HOURS", "24")),
+            )
 
     async def initialize(self):
         if not self.api_id or not self.api_hash or not self.phone:
@@ -89,245 +248,112 @@ class TelegramDealBot:
         return True
 
     def _parse_price(self, price_str: str) -> float:
-        if not price_str: return 0.0
-        try:
-            # Önce TL, ₺, lira gibi kelimeleri temizle
-            price_str = price_str.split('TL')[0].split('₺')[0].split('lira')[0].strip()
-            # Sadece sayı, nokta ve virgül bırak
-            price_str = re.sub(r'[^\d,\.]', '', price_str)
-            
-            # Türk formatı: 1.234,56 veya 1234,56
-            if ',' in price_str and '.' in price_str:
-                if price_str.find('.') < price_str.find(','):
-                    # 1.234,56 formatı - binlik ayırıcı nokta, ondalık virgül
-                    price_str = price_str.replace('.', '').replace(',', '.')
-                else:
-                    # 1234,56.789 gibi garip format - virgülü kaldır
-                    price_str = price_str.replace(',', '')
-            elif ',' in price_str:
-                # Virgül var, nokta yok
-                parts = price_str.split(',')
-                if len(parts[-1]) <= 2:
-                    # Son kısım 2 haneden az - muhtemelen ondalık (1234,50)
-                    price_str = price_str.replace(',', '.')
-                else:
-                    # Son kısım 3+ hane - muhtemelen binlik ayırıcı (1,234)
-                    price_str = price_str.replace(',', '')
-            return float(price_str)
-        except:
-            return 0.0
+        return parse_price(price_str)
     
     def _extract_price_from_text(self, text: str) -> float:
         """Mesaj metninden fiyat çıkarmaya çalış"""
-        if not text:
-            return 0.0
-        
-        # Fiyat desenleri: "950 TL", "1.234,56 ₺", "2.500 lira", "₺950", "950,00 TL" vb.
-        patterns = [
-            r'(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s*(?:TL|₺|lira|fiyat|Fiyat)',
-            r'(?:TL|₺|lira|fiyat|Fiyat):?\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
-            r'₺\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
-            r'(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s*TL',
-            r'(\d+(?:,\d{2})?)\s*(?:TL|₺)',
-            r'fiyat[:\s]+(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
-            r'(\d{1,3}(?:\.\d{3})*)\s*(?:TL|₺)',
-            r'(\d+)\s*(?:TL|₺)',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                price_str = matches[0]
-                parsed = self._parse_price(price_str)
-                if parsed > 0:
-                    logger.info(f"💰 Regex ile fiyat bulundu: {price_str} -> {parsed} TL")
-                    return parsed
-        
-        return 0.0
+        price = extract_price(text)
+        if price > 0:
+            step_log.info("💰 Regex ile fiyat bulundu: %s TL", price)
+        return price
     
     def _extract_store_from_url(self, url: str) -> str:
-        """Link'ten site/mağaza adını çıkar"""
-        try:
-            parsed = urlparse(url)
-            domain = parsed.netloc.lower()
-            
-            # www. ve diğer prefix'leri kaldır
-            domain = domain.replace('www.', '').replace('m.', '')
-            
-            # Türkçe e-ticaret siteleri mapping
-            store_mapping = {
-                'amazon.com.tr': 'Amazon',
-                'amazon.tr': 'Amazon',
-                'trendyol.com': 'Trendyol',
-                'trendyol.com.tr': 'Trendyol',
-                'hepsiburada.com': 'Hepsiburada',
-                'n11.com': 'N11',
-                'gittigidiyor.com': 'GittiGidiyor',
-                'teknosa.com': 'Teknosa',
-                'mediamarkt.com.tr': 'MediaMarkt',
-                'vatanbilgisayar.com': 'Vatan Bilgisayar',
-                'ciceksepeti.com': 'ÇiçekSepeti',
-                'kitapyurdu.com': 'Kitap Yurdu',
-                'd&r.com.tr': 'D&R',
-                'migros.com.tr': 'Migros',
-                'carrefoursa.com.tr': 'CarrefourSA',
-            }
-            
-            # Mapping'de varsa döndür
-            if domain in store_mapping:
-                return store_mapping[domain]
-            
-            # Domain'in ilk kısmını al (örn: amazon.com.tr -> amazon)
-            domain_parts = domain.split('.')
-            if domain_parts:
-                store_name = domain_parts[0].capitalize()
-                return store_name
-            
-            return 'Bilinmeyen'
-        except:
-            return 'Bilinmeyen'
+        """Link'ten site/mağaza adını çıkar (stores.json'daki alan adları ve kısa linkler)"""
+        return self.store_resolver.resolve(url)
 
     async def fetch_link_data(self, url: str) -> Dict:
-        try:
-            response = curl_requests.get(url, impersonate="chrome110", timeout=30, allow_redirects=True)
-            if response.status_code == 200:
-                return {'html': response.text, 'final_url': response.url}
-            return {}
-        except Exception as e:
-            logger.error(f"❌ Link hatası: {e}")
-            return {}
+        with self.metrics.track('fetch_link_data'):
+            try:
+                result = await self.fetcher.fetch(url)
+            except Exception as e:
+                logger.error(f"❌ Link hatası: {e}")
+                result = {}
+            if not result:
+                self.metrics.error('fetch_link_data')
+            return result
 
-    def extract_html_data(self, html: str, base_url: str) -> dict:
-        data = {'price': 0.0, 'image': '', 'title': ''}
-        if not html: 
-            logger.warning("⚠️ HTML boş, veri çıkarılamıyor")
-            return data
+    def _claim_deal(self, keys: List[str], owner: str = None) -> bool:
+        """Deal daha önce (başka bir mesajda) işlenmediyse index'e kaydet ve True döndür, tekrar ise False"""
+        if not self.dedup:
+            return True
+        duplicate_key = self.dedup.claim(keys, owner)
+        if duplicate_key:
+            logger.info(f"♻️ Tekrar eden deal atlanıyor (eşleşme: {duplicate_key})")
+            return False
+        return True
+
+    async def get_link_info(self, url: str) -> Dict:
+        """Link'in son adresini ve sayfa verisini (görsel/başlık/fiyat) döndür - önce cache'e bak"""
+        key = normalize_url(url)
+        cached = self.link_cache.get(key)
+        if cached is not None:
+            step_log.info("⚡ Link cache'ten geldi: %.80s", url)
+            return cached
+        if self.html_streaming:
+            info = await self.fetch_link_meta(url)
+        else:
+            html_res = await self.fetch_link_data(url)
+            info = {}
+            if html_res:
+                with self.metrics.track('extract_html_data'):
+                    info = self.extract_html_data(html_res['html'], html_res['final_url'])
+                info['final_url'] = html_res['final_url']
+        if info:
+            self.link_cache.set(key, info)
+        return info
+
+    async def fetch_link_meta(self, url: str) -> Dict:
+        """Sayfayı akış halinde okuyup meta/JSON-LD verisini çıkar, hepsi bulununca indirmeyi kes"""
+        extractor = StreamingMetaExtractor(self._parse_price)
+        with self.metrics.track('fetch_link_meta'):
+            try:
+                res = await self.fetcher.fetch_stream(url, extractor.feed, self.html_max_bytes)
+            except Exception as e:
+                logger.error(f"❌ Link hatası: {e}")
+                res = {}
+            if not res:
+                self.metrics.error('fetch_link_meta')
+                return {}
         try:
-            soup = BeautifulSoup(html, 'html.parser')  # lxml yerine html.parser daha güvenilir
-            from urllib.parse import urljoin
-            
-            def make_absolute_url(url):
-                if not url or not url.strip():
-                    return ''
-                url = url.strip()
-                if url.startswith('http://') or url.startswith('https://'):
-                    return url
-                if url.startswith('//'):
-                    return 'https:' + url
-                return urljoin(base_url, url)
-            
-            # 1. Görseli çek - Önce og:image (en yaygın)
-            if not data['image']:
-                img_tag = soup.find('meta', property='og:image')
-                if img_tag:
-                    img_url = img_tag.get('content', '').strip()
-                    if img_url:
-                        data['image'] = make_absolute_url(img_url)
-                        logger.info(f"✅ Görsel bulundu (og:image): {data['image'][:80]}")
-            
-            # 2. Twitter image fallback
-            if not data['image']:
-                img_tag = soup.find('meta', attrs={'name': 'twitter:image'})
-                if img_tag:
-                    img_url = img_tag.get('content', '').strip()
-                    if img_url:
-                        data['image'] = make_absolute_url(img_url)
-                        logger.info(f"✅ Görsel bulundu (twitter:image): {data['image'][:80]}")
-            
-            # 3. JSON-LD'den görsel çek
-            if not data['image']:
-                for script in soup.find_all('script', type='application/ld+json'):
-                    try:
-                        js = json.loads(script.string)
-                        if isinstance(js, list) and js:
-                            js = js[0]
-                        if isinstance(js, dict):
-                            img = js.get('image', '')
-                            if img:
-                                if isinstance(img, list) and img:
-                                    img = img[0]
-                                if isinstance(img, str) and img.strip():
-                                    data['image'] = make_absolute_url(img.strip())
-                                    logger.info(f"✅ Görsel bulundu (JSON-LD): {data['image'][:80]}")
-                                    break
-                    except:
-                        continue
-            
-            # 4. İlk img tag'i (son çare)
-            if not data['image']:
-                img_tag = soup.find('img', src=True)
-                if img_tag:
-                    img_url = img_tag.get('src', '').strip() or img_tag.get('data-src', '').strip()
-                    if img_url:
-                        data['image'] = make_absolute_url(img_url)
-                        logger.info(f"✅ Görsel bulundu (img tag): {data['image'][:80]}")
-            
-            # Başlık çek
-            if not data['title']:
-                title_tag = soup.find('meta', property='og:title')
-                if title_tag:
-                    data['title'] = title_tag.get('content', '').strip()
-                if not data['title']:
-                    title_tag = soup.find('title')
-                    if title_tag:
-                        data['title'] = title_tag.get_text().strip()
-            
-            # Fiyat çek - JSON-LD'den
-            if not data['price']:
-                for script in soup.find_all('script', type='application/ld+json'):
-                    try:
-                        js = json.loads(script.string)
-                        if isinstance(js, list) and js:
-                            js = js[0]
-                        if isinstance(js, dict):
-                            # Product tipini kontrol et
-                            if js.get('@type') == 'Product' or 'Product' in str(js.get('@type', [])):
-                                offers = js.get('offers', {})
-                                if isinstance(offers, dict):
-                                    price = offers.get('price') or offers.get('lowPrice') or offers.get('highPrice', 0)
-                                    if price:
-                                        parsed = self._parse_price(str(price))
-                                        if parsed > 0:
-                                            data['price'] = parsed
-                                            logger.info(f"✅ Fiyat bulundu (JSON-LD Product): {data['price']} TL")
-                                            break
-                                elif isinstance(offers, list) and offers:
-                                    price = offers[0].get('price', 0) if isinstance(offers[0], dict) else 0
-                                    if price:
-                                        parsed = self._parse_price(str(price))
-                                        if parsed > 0:
-                                            data['price'] = parsed
-                                            logger.info(f"✅ Fiyat bulundu (JSON-LD Product list): {data['price']} TL")
-                                            break
-                            else:
-                                # Genel offers kontrolü
-                                offers = js.get('offers', {})
-                                if isinstance(offers, dict):
-                                    price = offers.get('price') or offers.get('lowPrice', 0)
-                                    if price:
-                                        parsed = self._parse_price(str(price))
-                                        if parsed > 0:
-                                            data['price'] = parsed
-                                            logger.info(f"✅ Fiyat bulundu (JSON-LD): {data['price']} TL")
-                                            break
-                    except Exception as e:
-                        logger.debug(f"JSON-LD price parse hatası: {e}")
-                        continue
-            
-            # Fiyat bulunamadıysa log
-            if not data['price']:
-                logger.warning("⚠️ HTML'den fiyat bulunamadı, AI'den gelecek")
-            if not data['image']:
-                logger.warning("⚠️ Görsel bulunamadı")
+            extractor.close()
+        except Exception:
+            pass
+        info = extractor.result(res['final_url'])
+        info['final_url'] = res['final_url']
+        step_log.info(
+            "📄 Sayfadan %d KB okundu%s", res['bytes_read'] // 1024,
+            ' (veriler bulundu, indirme erken kesildi)' if res['stopped_early'] else ''
+        )
+        return info
 
-        except Exception as e:
-            logger.error(f"❌ HTML analiz hatası: {e}", exc_info=True)
-        return data
+    def extract_html_data(self, html: str, base_url: str) -> dict:
+        return extract_html_data(html, base_url, self._parse_price)
 
     async def analyze_deal_with_ai(self, text: str, link: str = "", image_bytes: bytes = None, html_text: str = "") -> Dict:
         if not model: 
             logger.warning("⚠️ AI modeli yok, analiz yapılamıyor")
             return {}
+        key = content_key(text, link, image_bytes)
+        cached = self.ai_cache.get(key)
+        if cached is not None:
+            step_log.info("⚡ AI sonucu cache'ten geldi: %s", cached)
+            return dict(cached)
+        with self.metrics.track('analyze_deal_with_ai'):
+            ai_result = await self._run_ai_analysis(text, link, image_bytes)
+        if ai_result:
+            self.ai_cache.set(key, ai_result)
+        else:
+            self.metrics.error('analyze_deal_with_ai')
+        return ai_result
+
+    async def _run_ai_analysis(self, text: str, link: str = "", image_bytes: bytes = None) -> Dict:
+        # Görselsiz analizler kısa bir pencere içinde toplanıp tek istekte gönderilir
+        if not image_bytes and self.ai_batcher is not None:
+            batched = await self.ai_batcher.submit(text, link)
+            if batched:
+                batched.pop('id', None)
+                step_log.info("✅ AI analizi (toplu) tamamlandı: %s", batched)
+                return self._normalize_ai_result(batched)
         try:
             # Fiyat bulmak için tüm kaynakları kullan
             analysis_text = f"""Telegram Mesajı:
@@ -445,30 +471,24 @@ KATEGORİ SEÇENEKLERİ (mutlaka bunlardan birini seç):
 - MUTLAKA GEÇERLİ BİR JSON döndür, başka açıklama, yorum veya markdown ekleme!
 - JSON formatında hata olursa bot çalışmayacak, dikkatli ol!"""
             
-            logger.info("🤖 AI analizi başlatılıyor (görsel ve metin analizi)...")
+            step_log.info("🤖 AI analizi başlatılıyor (görsel ve metin analizi)...")
             
             # Eğer görsel varsa, görseli de gönder
             if image_bytes:
                 try:
-                    # Gemini API'ye görsel göndermek için PIL Image kullan
-                    try:
-                        from PIL import Image
-                        import io
-                        # Bytes'tan Image oluştur
-                        image = Image.open(io.BytesIO(image_bytes))
-                        logger.info("📸 Görsel AI'ye gönderiliyor (OCR ile fiyat okuma)...")
-                        # Hem görsel hem metin gönder
-                        response = await model.generate_content_async(
-                            [image, prompt],
-                            generation_config=genai.types.GenerationConfig(temperature=0.1)
-                        )
-                    except ImportError:
-                        logger.warning("⚠️ PIL (Pillow) yüklü değil, görsel analizi yapılamıyor. 'pip install Pillow' çalıştırın.")
-                        # Pillow yoksa sadece metin gönder
-                        response = await model.generate_content_async(
-                            prompt, 
-                            generation_config=genai.types.GenerationConfig(temperature=0.1)
-                        )
+                    # Görsel thread pool'da küçültülüp sıkıştırılır, Gemini'ye ham bayt olarak gider
+                    image_part = await self.image_prep.prepare(image_bytes)
+                    step_log.info("📸 Görsel AI'ye gönderiliyor (OCR ile fiyat okuma)...")
+                    started = time.perf_counter()
+                    # Hem görsel hem metin gönder
+                    response = await model.generate_content_async(
+                        [image_part, prompt],
+                        generation_config=genai.types.GenerationConfig(temperature=0.1)
+                    )
+                    elapsed = time.perf_counter() - started
+                    self.ocr_calls += 1
+                    self.ocr_seconds += elapsed
+                    step_log.info("⏱️ OCR analizi %.2fs sürdü", elapsed)
                 except Exception as img_error:
                     logger.warning(f"⚠️ Görsel işleme hatası, sadece metin analizi yapılıyor: {img_error}")
                     # Görsel işlenemezse sadece metin gönder
@@ -485,7 +505,7 @@ KATEGORİ SEÇENEKLERİ (mutlaka bunlardan birini seç):
             
             # Response'tan JSON çıkar
             response_text = response.text.strip()
-            logger.info(f"📝 AI response (ilk 500 karakter): {response_text[:500]}")
+            step_log.debug("📝 AI response (ilk 500 karakter): %.500s", response_text)
             
             # Markdown code block'ları temizle
             if '```json' in response_text:
@@ -496,24 +516,8 @@ KATEGORİ SEÇENEKLERİ (mutlaka bunlardan birini seç):
             # JSON'u parse et
             try:
                 ai_result = json.loads(response_text)
-                logger.info(f"✅ AI analizi tamamlandı: {ai_result}")
-                
-                # Fiyat kontrolü - eğer string ise parse et
-                if 'price' in ai_result:
-                    if isinstance(ai_result['price'], str):
-                        try:
-                            ai_result['price'] = float(ai_result['price'].replace(',', '.').replace(' TL', '').replace('₺', '').strip())
-                        except:
-                            ai_result['price'] = 0.0
-                    elif ai_result['price'] is None:
-                        ai_result['price'] = 0.0
-                
-                # Kategori kontrolü - eğer yoksa veya geçersizse 'diğer' yap
-                if 'category' not in ai_result or not ai_result['category']:
-                    ai_result['category'] = 'diğer'
-                    logger.warning("⚠️ AI kategori döndürmedi, 'diğer' kullanılıyor")
-                
-                return ai_result
+                step_log.info("✅ AI analizi tamamlandı: %s", ai_result)
+                return self._normalize_ai_result(ai_result)
             except json.JSONDecodeError as json_err:
                 logger.error(f"❌ AI JSON parse hatası: {json_err}")
                 logger.error(f"📝 Parse edilemeyen response: {response_text[:500]}")
@@ -551,8 +555,79 @@ KATEGORİ SEÇENEKLERİ (mutlaka bunlardan birini seç):
             logger.error(f"❌ AI hatası: {e}", exc_info=True)
             return {}
 
-    async def save_to_firestore(self, deal_data: dict):
-        if not db:
+    def _analyze_without_ai(self, text: str, link: str, price: float, category: str, confidence: float,
+                            page_title: str = "") -> Dict:
+        """Kurallarla bulunan kategoriye mağaza da eklenebiliyorsa Gemini'ye gitmeden sonuç döndür, yoksa {}"""
+        store = self._extract_store_from_url(link)
+        if price <= 0 or store == 'Bilinmeyen':
+            return {}
+        self.ai_calls_avoided += 1
+        # Başlık: sayfa başlığı > mesajın link içermeyen ilk satırı
+        title = page_title
+        if not title:
+            lines = [l.strip() for l in text.splitlines() if l.strip() and 'http' not in l]
+            title = lines[0] if lines else text
+        step_log.info("🧠 Kategori kurallarla bulundu: %s (güven %.2f), AI çağrısı atlandı", category, confidence)
+        return {'title': title[:100], 'price': price, 'category': category, 'store': store}
+
+    def _normalize_ai_result(self, ai_result: dict) -> dict:
+        # Fiyat kontrolü - eğer string ise parse et
+        if 'price' in ai_result:
+            if isinstance(ai_result['price'], str):
+                try:
+                    ai_result['price'] = float(ai_result['price'].replace(',', '.').replace(' TL', '').replace('₺', '').strip())
+                except:
+                    ai_result['price'] = 0.0
+            elif ai_result['price'] is None:
+                ai_result['price'] = 0.0
+        
+        # Kategori kontrolü - eğer yoksa veya geçersizse 'diğer' yap
+        if 'category' not in ai_result or not ai_result['category']:
+            ai_result['category'] = 'diğer'
+            logger.warning("⚠️ AI kategori döndürmedi, 'diğer' kullanılıyor")
+        
+        return ai_result
+
+    async def _analyze_batch_with_ai(self, items: List[Dict]) -> List[Dict]:
+        """Birden fazla görselsiz mesajı tek Gemini isteğinde analiz et, sonuçları id ile döndür"""
+        messages = json.dumps(
+            [{'id': item['id'], 'mesaj': item['text'], 'link': item['link']} for item in items],
+            ensure_ascii=False, indent=1,
+        )
+        prompt = f"""Sen bir Türk e-ticaret uzmanısın. Aşağıdaki JSON listesindeki her Telegram mesajını AYRI AYRI analiz et.
+
+MESAJLAR:
+{messages}
+
+HER MESAJ İÇİN:
+1. ÜRÜN ADI: Mesajdaki ürün başlığını, marka ve model bilgisini çıkar
+2. FİYAT: "950 TL" -> 950.0, "1.234,56 ₺" -> 1234.56 (sadece sayı)
+3. KATEGORİ: elektronik, moda, ev_yasam, anne_bebek, kozmetik, spor_outdoor, supermarket, yapi_oto, kitap_hobi, diğer
+4. MAĞAZA: Link'teki domain adından veya mesajdan mağaza adını çıkar
+
+ÇIKTI FORMATI (MUTLAKA SADECE JSON DİZİSİ, BAŞKA HİÇBİR ŞEY YAZMA):
+[
+  {{"id": "mesajın id değeri", "title": "ürün başlığı", "price": 1234.50, "category": "elektronik", "store": "mağaza adı"}}
+]
+
+ÖNEMLİ KURALLAR:
+- Her mesaj için bir nesne döndür ve "id" alanını mesajdaki id ile AYNEN doldur
+- Fiyat mutlaka sayı olarak döndür (string değil, örn: 950.0)
+- MUTLAKA GEÇERLİ BİR JSON döndür, başka açıklama, yorum veya markdown ekleme!"""
+        response = await model.generate_content_async(
+            prompt,
+            generation_config=genai.types.GenerationConfig(temperature=0.1)
+        )
+        response_text = response.text.strip()
+        if '```json' in response_text:
+            response_text = response_text.split('```json')[1].split('```')[0].strip()
+        elif '```' in response_text:
+            response_text = response_text.split('```')[1].split('```')[0].strip()
+        result = json.loads(response_text)
+        return result if isinstance(result, list) else []
+
+    async def save_to_firestore(self, deal_data: dict, doc_id: str = None):
+        if not self.writer:
             logger.error("❌ Firestore bağlantısı yok! Kayıt yapılamıyor!")
             return False
         try:
@@ -568,84 +643,176 @@ KATEGORİ SEÇENEKLERİ (mutlaka bunlardan birini seç):
             deal_data['views'] = 0
             deal_data['isEditorPick'] = False
             
-            doc_ref = db.collection('deals').document()
-            doc_ref.set(deal_data)
-            logger.info(f"✅ Firestore'a kaydedildi: {deal_data.get('title')}")
+            # Outbox yoksa ve kuyruk doluysa burada beklenir (backpressure)
+            with self.metrics.track('firestore_enqueue'):
+                await self.writer.submit(deal_data, doc_id)
+            step_log.info("📥 Firestore yazma kuyruğuna alındı: %s", deal_data.get('title'))
+            self.metrics.inc('deals_saved_total')
             return True
         except Exception as e:
             logger.error(f"❌ Firestore kayıt hatası: {e}")
             return False
 
-    async def process_message(self, text, chat_id, name, event=None):
-        logger.info(f"📥 Mesaj İşleniyor... Kanal: {name}")
-        # Telegram spam algılamasından kaçınmak için random delay (1-3 saniye arası)
-        import random
-        delay = random.uniform(1.0, 3.0)
-        await asyncio.sleep(delay)
-        urls = re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', text)
+    async def _stage(self, name: str, coro, timeout: float, default=None):
+        """Bir işleme aşamasını kendi timeout'uyla çalıştır, süre aşılırsa default döndür"""
+        try:
+            return await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ {name} aşaması {timeout:g}s içinde bitmedi, atlanıyor")
+            self.metrics.inc('stage_timeouts_total', stage=name)
+            return default
+
+    async def _download_photo(self, message, purposes) -> Dict[str, bytes]:
+        """Fotoğrafı istenen amaçlar ('ocr', 'upload', 'thumbnail') için uygun boyutta indir"""
+        try:
+            step_log.info("📸 Telegram mesajında fotoğraf bulundu, indiriliyor...")
+            with self.metrics.track('telegram_download'):
+                result = await self.media_fetcher.download(message.client, message.photo, purposes)
+            self.metrics.inc('telegram_download_bytes_total', result['bytes'])
+            if result['images']:
+                step_log.info(
+                    "✅ Telegram fotoğrafı indirildi (%d bytes, %.2fs, %s)",
+                    result['bytes'], result['seconds'], ', '.join(result['images'])
+                )
+            return result['images']
+        except Exception as e:
+            logger.error(f"❌ Telegram fotoğraf indirme hatası: {e}")
+            return {}
+
+    async def _upload_photo(self, image_bytes: bytes):
+        with self.metrics.track('imgbb_upload'):
+            url = await self.uploader.upload(image_bytes)
+        if not url:
+            self.metrics.error('imgbb_upload')
+        return url
+
+    async def _scrape_link(self, link: str, dedup_keys: List[str], owner: str = None):
+        """Sayfa verisini al; kısa link başka kanalda paylaşılmış bir ürüne çözümlendiyse None döndür"""
+        step_log.info("🌐 Görsel yok, HTML scraping deneniyor (sadece görsel için): %s", link)
+        html_data = await self.get_link_info(link)
+        if not html_data:
+            step_log.info("⚠️ HTML içeriği alınamadı, AI'ya güveniliyor")
+            return {}
+        step_log.info("✅ Sayfa verisi alındı")
+        # Kısa link yeni çözümlendiyse gerçek ürün kimliğiyle tekrar kontrol et (AI'dan önce)
+        final_key = canonical_product_key(html_data['final_url'])
+        if final_key not in dedup_keys and not self._claim_deal([final_key], owner):
+            return None
+        if html_data.get('image'):
+            step_log.info("✅ HTML'den görsel bulundu: %.80s", html_data.get('image'))
+        return html_data
+
+    async def process_message(self, text, chat_id, name, message=None, links=None):
+        step_log.info("📥 Mesaj İşleniyor... Kanal: %s", name)
+        # Handler linkleri zaten çıkardıysa mesaj tekrar taranmaz
+        if links is None:
+            links = extract_links(message) if message is not None else extract_links_from_text(text)
         
-        if not urls:
+        if not links:
             return  # Link yoksa işleme (güvenlik kontrolü)
             
-        link = urls[0]
-        logger.info(f"🔗 Link: {link}")
+        link = links[0]
+        step_log.info("🔗 Link: %s", link)
+        # Aynı Telegram mesajı tekrar işlenirse (outbox tekrarı, yeniden başlatma) aynı doküman güncellenir;
+        # yarıda kalan mesaj catch-up'ta tekrar işlenirken kendi dedup kaydına takılmaz
+        doc_id = f"tg_{chat_id}_{message.id}" if message is not None else None
+
+        # Aynı ürün başka kanalda zaten işlendiyse indirme/scraping/AI yapmadan atla.
+        # Kısa link daha önce çözümlendiyse cache'teki son adres de kontrol edilir. Mesaj metni
+        # anahtar olarak kullanılmaz: kanallar aynı şablon metinle farklı ürünler paylaşıyor.
+        dedup_keys = [canonical_product_key(link)]
+        cached_link = self.link_cache.peek(normalize_url(link))
+        if cached_link and cached_link.get('final_url'):
+            dedup_keys.append(canonical_product_key(cached_link['final_url']))
+        if not self._claim_deal(dedup_keys, doc_id):
+            return
+        # Mesajdaki fiyat bir kez çıkarılır; hem kural tabanlı analizde hem kayıtta kullanılır
+        price_from_text = self._extract_price_from_text(text)
         
-        # Telegram'dan görsel varsa öncelik ver - direkt download_media kullan
+        # Aşamalar birbirini beklemeden çalışır: fotoğraf indirilince imgbb yüklemesi ve
+        # AI analizi paralel başlar, görsel yoksa sayfa çekme AI ile paralel yürür.
+        # Her aşamanın kendi timeout'u var; deal atlanırsa kalan aşamalar iptal edilir.
+        has_photo = bool(message and getattr(message, 'photo', None))
         telegram_image_url = None
         telegram_image_bytes = None  # AI analizi için görsel bytes'ı sakla
-        if event and event.message and hasattr(event.message, 'photo') and event.message.photo:
-            try:
-                logger.info("📸 Telegram mesajında fotoğraf bulundu, indiriliyor...")
-                # Fotoğrafı bytes olarak indir
-                photo_bytes = await event.client.download_media(event.message.photo, file=bytes)
-                if photo_bytes:
-                    logger.info(f"✅ Telegram fotoğrafı indirildi ({len(photo_bytes)} bytes)")
-                    telegram_image_bytes = photo_bytes  # AI analizi için sakla
-                    
-                    # Fotoğrafı imgbb API'ye upload et (Firestore'a kaydetmek için)
-                    imgbb_api_key = os.getenv("IMGBB_API_KEY", "")
-                    if imgbb_api_key:
-                        try:
-                            import base64
-                            photo_b64 = base64.b64encode(photo_bytes).decode('utf-8')
-                            
-                            async with aiohttp.ClientSession() as session:
-                                data = aiohttp.FormData()
-                                data.add_field('key', imgbb_api_key)
-                                data.add_field('image', photo_b64)
-                                
-                                async with session.post('https://api.imgbb.com/1/upload', data=data) as resp:
-                                    if resp.status == 200:
-                                        result = await resp.json()
-                                        if result.get('success'):
-                                            telegram_image_url = result['data']['url']
-                                            logger.info(f"✅ Telegram fotoğrafı imgbb'ye yüklendi: {telegram_image_url[:80]}")
-                        except Exception as e2:
-                            logger.warning(f"⚠️ imgbb upload hatası: {e2}")
-                    else:
-                        logger.info("ℹ️ IMGBB_API_KEY yok, Telegram fotoğrafı imgbb'ye yüklenemedi ama AI analizi için kullanılacak")
-            except Exception as e:
-                logger.error(f"❌ Telegram fotoğraf indirme hatası: {e}")
-        
-        # HTML scraping'i minimalize et - sadece görsel için (opsiyonel)
-        # Görsel yoksa HTML scraping'i atla, AI'ya güven
+        upload_task = None
+        html_task = None
+        ai_task = None
         html_data = {}
-        if not telegram_image_url:
-            logger.info(f"🌐 Görsel yok, HTML scraping deneniyor (sadece görsel için): {link}")
-            html_res = await self.fetch_link_data(link)
-            if html_res:
-                logger.info("✅ HTML içeriği alındı, sadece görsel çıkarılıyor...")
-                html_data = self.extract_html_data(html_res['html'], html_res['final_url'])
-                link = html_res['final_url']
-                if html_data.get('image'):
-                    logger.info(f"✅ HTML'den görsel bulundu: {html_data.get('image')[:80]}")
-            else:
-                logger.info("⚠️ HTML içeriği alınamadı, AI'ya güveniliyor")
-        else:
-            logger.info("✅ Telegram görseli mevcut, HTML scraping atlanıyor")
+        try:
+            # Fotoğraf yüklenecekse görsel sayfadan alınmaz; aksi halde sayfa hemen çekilmeye başlar
+            if not (has_photo and self.uploader):
+                html_task = asyncio.create_task(
+                    self._stage('sayfa', self._scrape_link(link, dedup_keys, doc_id), self.stage_timeouts['html'], {})
+                )
+            photos = {}
+            if has_photo:
+                purposes = ('ocr', 'upload') if self.uploader else ('ocr',)
+                photos = await self._stage(
+                    'fotoğraf indirme', self._download_photo(message, purposes), self.stage_timeouts['download'], {}
+                )
+                telegram_image_bytes = photos.get('ocr')
+            if photos.get('upload'):
+                # Fotoğrafı imgbb'ye yükle (Firestore'a kaydetmek için) - AI analiziyle paralel çalışır
+                upload_task = asyncio.create_task(
+                    self._stage('imgbb yükleme', self._upload_photo(photos['upload']), self.stage_timeouts['upload'])
+                )
+            elif telegram_image_bytes:
+                step_log.info("ℹ️ IMGBB_API_KEY yok, Telegram fotoğrafı imgbb'ye yüklenemedi ama AI analizi için kullanılacak")
+            elif html_task is None:
+                # Fotoğraf indirilemedi, görseli sayfadan almayı dene
+                html_task = asyncio.create_task(
+                    self._stage('sayfa', self._scrape_link(link, dedup_keys, doc_id), self.stage_timeouts['html'], {})
+                )
+            if html_task is None:
+                step_log.info("✅ Telegram görseli mevcut, HTML scraping atlanıyor")
+
+            # Kategori kurallarla güvenle bulunduysa (ve mesajda fiyat varsa) mağaza için çözümlenmiş
+            # link beklenir; aksi halde AI sayfa çekmeyi beklemeden hemen başlar
+            ai_data = {}
+            category, confidence = None, 0.0
+            if self.classifier and price_from_text > 0:
+                category, confidence = self.classifier.classify(text)
+            if category:
+                if html_task:
+                    html_data = await html_task
+                    if html_data is None:
+                        return
+                    link = html_data.get('final_url', link)
+                ai_data = self._analyze_without_ai(
+                    text, link, price_from_text, category, confidence, html_data.get('title', '')
+                )
+            if not ai_data:
+                # AI ile analiz et - görsel varsa görseli gönder, HTML gönderme
+                ai_task = asyncio.create_task(self._stage(
+                    'AI analizi', self.analyze_deal_with_ai(text, link, telegram_image_bytes, ""),
+                    self.stage_timeouts['ai'], {}
+                ))
+                if html_task:
+                    html_data = await html_task
+                    if html_data is None:
+                        return
+                    link = html_data.get('final_url', link)
+                ai_data = await ai_task
+
+            if upload_task:
+                telegram_image_url = await upload_task
+                if telegram_image_url:
+                    step_log.info("✅ Telegram fotoğrafı imgbb'ye yüklendi: %.80s", telegram_image_url)
+                else:
+                    # Yükleme başarısızsa görseli sayfadan almayı dene
+                    html_data = await self._stage(
+                        'sayfa', self._scrape_link(link, dedup_keys, doc_id), self.stage_timeouts['html'], {}
+                    )
+                    if html_data is None:
+                        return
+                    link = html_data.get('final_url', link)
+        finally:
+            # Deal atlandıysa veya hata olduysa yarım kalan aşamaları iptal et
+            for task in (html_task, ai_task, upload_task):
+                if task is not None and not task.done():
+                    task.cancel()
         
-        # AI ile analiz et - görsel varsa görseli gönder, HTML gönderme
-        ai_data = await self.analyze_deal_with_ai(text, link, telegram_image_bytes, "")
         if not ai_data:
             logger.warning("⚠️ AI analizi başarısız, temel veri kullanılıyor")
             ai_data = {
@@ -666,13 +833,12 @@ KATEGORİ SEÇENEKLERİ (mutlaka bunlardan birini seç):
         title = ai_data.get('title') or text[:100]
         
         # Fiyat çıkarma önceliği: Mesajdan direkt (en güvenilir) > AI > 0.0
-        price_from_text = self._extract_price_from_text(text)
         if price_from_text > 0:
             price = price_from_text
-            logger.info(f"💰 Fiyat mesajdan (regex) çıkarıldı: {price} TL")
+            step_log.info("💰 Fiyat mesajdan (regex) çıkarıldı: %s TL", price)
         elif ai_data.get('price', 0.0) > 0:
             price = ai_data.get('price', 0.0)
-            logger.info(f"💰 Fiyat AI'dan çıkarıldı: {price} TL")
+            step_log.info("💰 Fiyat AI'dan çıkarıldı: %s TL", price)
         else:
             price = 0.0
             logger.warning(f"⚠️ Fiyat bulunamadı!")
@@ -685,18 +851,18 @@ KATEGORİ SEÇENEKLERİ (mutlaka bunlardan birini seç):
         else:
             category = category.strip().lower()
             if telegram_image_bytes:
-                logger.info(f"📂 Kategori görselden (AI) çıkarıldı: {category}")
+                step_log.info("📂 Kategori görselden (AI) çıkarıldı: %s", category)
             else:
-                logger.info(f"📂 Kategori mesajdan (AI) çıkarıldı: {category}")
+                step_log.info("📂 Kategori mesajdan (AI) çıkarıldı: %s", category)
         
         # Store: Link'ten domain çıkar > AI > Bilinmeyen
         store_from_link = self._extract_store_from_url(link)
         if store_from_link != 'Bilinmeyen':
             store = store_from_link
-            logger.info(f"🏪 Mağaza link'ten çıkarıldı: {store}")
+            step_log.info("🏪 Mağaza link'ten çıkarıldı: %s", store)
         elif ai_data.get('store') and ai_data.get('store') != 'Bilinmeyen':
             store = ai_data.get('store')
-            logger.info(f"🏪 Mağaza AI'dan çıkarıldı: {store}")
+            step_log.info("🏪 Mağaza AI'dan çıkarıldı: %s", store)
         else:
             store = 'Bilinmeyen'
             logger.warning(f"⚠️ Mağaza bulunamadı!")
@@ -718,69 +884,283 @@ KATEGORİ SEÇENEKLERİ (mutlaka bunlardan birini seç):
             'description': text[:500],
         }
         
-        logger.info(f"💾 Kaydediliyor: {final_data['title']} | Fiyat: {final_data['price']} TL | Görsel: {'Var' if final_data['imageUrl'] else 'Yok'} | Kategori: {final_data['category']} | Mağaza: {final_data['store']}")
+        logger.info(
+            "💾 Kaydediliyor: %s | Fiyat: %s TL | Görsel: %s | Kategori: %s | Mağaza: %s",
+            final_data['title'], final_data['price'], 'Var' if final_data['imageUrl'] else 'Yok',
+            final_data['category'], final_data['store'],
+        )
         
         # Firestore'a kaydet
-        await self.save_to_firestore(final_data)
+        await self.save_to_firestore(final_data, doc_id)
+
+    async def _process_and_checkpoint(self, text, chat_id, name, message=None, links=None):
+        """Mesajı izleme ID'siyle işle, bitince (başarılı olsun olmasın) checkpoint'e bildir"""
+        # İzleme ID'si Firestore doküman ID'siyle aynı: log kaydından dokümana gidilebilir
+        trace = begin_trace(f"tg_{chat_id}_{message.id}" if message is not None else None)
+        started = time.perf_counter()
+        cancelled = False
+        try:
+            await self.process_message(text, chat_id, name, message, links)
+        except asyncio.CancelledError:
+            # Kapanışta iptal edilen deal bitmiş sayılmaz; checkpoint onu geçmez, açılışta tekrar işlenir
+            cancelled = True
+            raise
+        finally:
+            if message is not None and not cancelled:
+                self.checkpoints.finish(message.chat_id, message.id)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.info(
+                "🧾 Deal işlendi (%.0f ms) [%s]", elapsed_ms, name,
+                extra={'duration_ms': round(elapsed_ms, 1), 'stages': stage_timings()},
+            )
+            end_trace(trace)
+
+    def _dispatch_once(self, peer_id: int, message_id: int) -> bool:
+        """Catch-up sürerken aynı mesajın hem canlı hem catch-up tarafından işlenmesini önle"""
+        if self._catchup_seen is None:
+            return True
+        key = (peer_id, message_id)
+        if key in self._catchup_seen:
+            return False
+        self._catchup_seen.add(key)
+        return True
+
+    async def _catch_up_one(self, semaphore: asyncio.Semaphore, message, peer_id: int, name: str):
+        async with semaphore:
+            links = extract_links(message)
+            if not links:
+                self.checkpoints.finish(peer_id, message.id)
+                return False
+            chat_id, _ = utils.resolve_id(peer_id)
+            try:
+                await self._process_and_checkpoint(message.message or "", chat_id, name, message, links)
+            except Exception as e:
+                logger.error(f"❌ Catch-up mesaj hatası [{name} #{message.id}]: {e}", exc_info=True)
+            return True
+
+    async def _catch_up(self):
+        """Bot kapalıyken kanallara düşen mesajları checkpoint'ten itibaren sınırlı paralellikle işle.
+
+        Kanalların checkpoint'i run() içinde tutulur (hold); kaçırılan mesajlar
+        işlemeye alınana kadar canlı mesajlar checkpoint'i onların ötesine taşımaz.
+        """
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.catchup_concurrency)
+        tasks = []
+        fetched = 0
+        cancelled = False
+        try:
+            for peer_id, name in self.channel_names.items():
+                try:
+                    last_id = self.checkpoints.get(peer_id)
+                    if last_id is None:
+                        # İlk çalıştırma: geçmiş işlenmez, sadece başlangıç noktası kaydedilir
+                        latest = await self.client.get_messages(peer_id, limit=1)
+                        if latest:
+                            self.checkpoints.advance(peer_id, latest[0].id)
+                        self.checkpoints.release(peer_id)
+                        continue
+                    messages = [
+                        m async for m in self.client.iter_messages(
+                            peer_id, min_id=last_id, limit=self.catchup_max_messages
+                        )
+                    ]
+                except (ValueError, RPCError) as e:
+                    logger.warning(f"⚠️ Catch-up: {name} mesajları alınamadı: {e}")
+                    self.checkpoints.release(peer_id)
+                    continue
+                if len(messages) >= self.catchup_max_messages:
+                    logger.warning(f"⚠️ Catch-up: {name} için sadece son {self.catchup_max_messages} mesaj işlenecek")
+                if messages:
+                    logger.info(f"📥 Catch-up: {name} kanalında {len(messages)} kaçırılmış mesaj (#{last_id} sonrası)")
+                fetched += len(messages)
+                # iter_messages yeniden eskiye döner, eskiden yeniye işlenir
+                for message in reversed(messages):
+                    if self._dispatch_once(peer_id, message.id):
+                        self.checkpoints.begin(peer_id, message.id)
+                        tasks.append(asyncio.create_task(self._catch_up_one(semaphore, message, peer_id, name)))
+                # Kaçırılan mesajlar kaydedildi, checkpoint artık bitenlerle ilerleyebilir
+                self.checkpoints.release(peer_id)
+            results = await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            self._catchup_seen = None
+            if not cancelled:
+                # Beklenmeyen hatada tutulan kanallar bırakılır, yoksa checkpoint hiç ilerlemez
+                for peer_id in self.channel_names:
+                    self.checkpoints.release(peer_id)
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"📊 Catch-up bitti: {fetched} mesaj çekildi, {sum(results)} deal işlendi, "
+            f"{elapsed:.1f}s ({fetched / elapsed if elapsed else 0:.1f} mesaj/s)"
+        )
+
+    def _register_gauges(self):
+        m = self.metrics
+        # Sadece bu ayarlarla çalışan aşamalar yayınlanır (akış modunda fetch_link_data hiç ölçülmez)
+        m.register('analyze_deal_with_ai', 'telegram_download')
+        if self.html_streaming:
+            m.register('fetch_link_meta')
+        else:
+            m.register('fetch_link_data', 'extract_html_data')
+        if self.uploader:
+            m.register('imgbb_upload')
+        if self.writer:
+            m.register('firestore_enqueue', 'firestore_flush')
+        m.describe('stage_errors_total', 'Hata veya boş sonuçla biten aşamalar')
+        m.describe('stage_timeouts_total', 'Süresi aşılan aşamalar')
+        m.describe('handler_errors_total', 'Mesaj handler\'ında oluşan hatalar')
+        m.describe('deals_saved_total', 'Firestore yazma kuyruğuna alınan deal\'ler')
+        m.describe('telegram_download_bytes_total', 'Telegram\'dan indirilen fotoğraf baytları')
+        m.gauge('queue_depth', 'İşlenmeyi bekleyen mesaj sayısı', lambda: self.queue.depth)
+        m.gauge('queue_processed_total', 'Worker\'ların işlediği mesaj sayısı', lambda: self.queue.processed, kind='counter')
+        m.gauge('queue_failed_total', 'Worker\'larda hata veren mesaj sayısı', lambda: self.queue.failed, kind='counter')
+        m.gauge('cache_hit_ratio', 'Cache isabet oranı', lambda: {
+            'link': self.link_cache.stats()['hit_rate'],
+            'ai': self.ai_cache.stats()['hit_rate'],
+            'store': self._store_hit_ratio(),
+        }, label='cache')
+        m.gauge('http_retries_total', 'Tekrar denenen HTTP istekleri', lambda: self.fetcher.retries, kind='counter')
+        m.gauge('http_rejected_total', 'Devre kesici nedeniyle gönderilmeyen istekler', lambda: self.fetcher.rejected, kind='counter')
+        m.gauge('http_open_breakers', 'Devre kesicisi açık host sayısı', lambda: len(self.fetcher.stats()['open_breakers']))
+        m.gauge('ai_calls_avoided_total', 'Kural tabanlı sınıflandırmayla atlanan AI çağrıları', lambda: self.ai_calls_avoided, kind='counter')
+        if self.dedup:
+            m.gauge('dedup_total', 'Dedup index sonuçları', lambda: {
+                'unique': self.dedup.unique, 'duplicate': self.dedup.duplicates,
+            }, label='result', kind='counter')
+        if self.writer:
+            m.gauge('firestore_pending', 'Firestore yazma kuyruğundaki kayıtlar', lambda: self.writer.depth)
+            m.gauge('firestore_written_total', 'Firestore\'a yazılan kayıtlar', lambda: self.writer.written, kind='counter')
+            m.gauge('firestore_failed_total', 'Firestore\'a yazılamayan kayıtlar', lambda: self.writer.failed, kind='counter')
+        if self.outbox:
+            m.gauge('outbox_pending', 'Outbox\'ta gönderilmeyi bekleyen kayıtlar', self.outbox.count)
+            m.gauge('outbox_dead', 'Deneme hakkı biten, gönderilmeyecek outbox kayıtları', self.outbox.dead_count)
+
+    def _store_hit_ratio(self) -> float:
+        stats = self.store_resolver.stats()
+        total = stats['hits'] + stats['misses']
+        return round(stats['hits'] / total, 3) if total else 0.0
 
     async def run(self):
         if not await self.initialize(): return
         
-        logger.info(f"📡 Dinlenen Kanallar: {self.channels}")
+        # Kanallar başlangıçta bir kez peer ID'ye çözümlenir (data/channels.json'da saklanır);
+        # abone olunmayan sohbetlerden gelen güncellemeler ağ isteği ve regex'e girmeden elenir
+        resolver = ChannelResolver(self.client, os.path.join(self.data_dir, 'channels.json'))
+        self.channel_names = await resolver.resolve(self.channels)
+        self.channel_ids = frozenset(self.channel_names)
+        if not self.channel_ids:
+            logger.error("❌ Dinlenecek kanal çözümlenemedi! SOURCE_CHANNELS ayarını kontrol edin.")
+            return
+        logger.info(f"📡 Dinlenen Kanallar: {self.channel_names}")
+        if self.catchup_enabled:
+            # Handler'dan önce: catch-up başlamadan gelen canlı mesajlar da tekrar kontrolüne girer
+            # ve checkpoint'i kaçırılan mesajların ötesine taşımaz
+            self._catchup_seen = set()
+            for peer_id in self.channel_names:
+                self.checkpoints.hold(peer_id)
 
-        @self.client.on(events.NewMessage())
+        @self.client.on(events.NewMessage(chats=list(self.channel_ids)))
         async def handler(event):
             try:
-                chat = await event.get_chat()
-                chat_id = chat.id
+                if event.chat_id not in self.channel_ids:
+                    return
+                if not self._dispatch_once(event.chat_id, event.id):
+                    return
+                # Doküman ID'leri işaretsiz kanal ID'siyle oluşturulur (tg_<id>_<mesaj>)
+                chat_id, _ = utils.resolve_id(event.chat_id)
                 text = event.message.message or ""
-                
-                # Debug: Her mesajı logla
-                logger.info(f"📩 MESAJ ALINDI: [Kanal ID: {chat_id}] - {text[:100]}...")
-                
-                # Önce link kontrolü yap - link yoksa hiçbir şey yapma
-                urls = re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', text)
-                if not urls:
-                    logger.debug(f"🔗 Link yok, atlanıyor: [ID: {chat_id}]")
+
+                # Önce link kontrolü yap (entity, buton, metin) - link yoksa hiçbir şey yapma
+                links = extract_links(event.message)
+                if not links:
+                    step_log.debug("🔗 Link yok, atlanıyor: [ID: %s]", chat_id)
+                    self.checkpoints.finish(event.chat_id, event.id)
                     return  # Link yoksa işleme
-                
-                logger.info(f"🔗 Link bulundu: {urls[0]}")
-                
-                # Filtrele - hem pozitif hem negatif ID'leri kontrol et
-                is_target = False
-                chat_id_str = str(chat_id)
-                chat_id_neg = f"-{chat_id_str}"
-                
-                logger.debug(f"🔍 Kanal kontrolü: {chat_id_str} / {chat_id_neg} | Hedef kanallar: {self.channels}")
-                
-                if (chat_id_str in self.channels or 
-                    chat_id_neg in self.channels or 
-                    (hasattr(chat, 'username') and f"@{chat.username}" in self.channels)):
-                    is_target = True
-                    logger.info(f"✅ Hedef kanal bulundu: {chat_id_str} / {chat_id_neg}")
-                    logger.info(f"📩 MESAJ İŞLENİYOR (Link içeriyor): [ID: {chat_id}] - {text[:50]}...")
-                else:
-                    logger.debug(f"⏭️ Hedef kanal değil, atlanıyor: {chat_id_str}")
-                
-                if is_target:
-                    # Rate limiting - aynı kanaldan çok hızlı mesaj gelirse bekle
-                    now = datetime.now()
-                    if chat_id_str in self.last_message_time:
-                        time_diff = (now - self.last_message_time[chat_id_str]).total_seconds()
-                        if time_diff < self.min_delay_seconds:
-                            wait_time = self.min_delay_seconds - time_diff
-                            logger.debug(f"⏳ Rate limiting: {wait_time:.1f} saniye bekleniyor...")
-                            await asyncio.sleep(wait_time)
-                    self.last_message_time[chat_id_str] = datetime.now()
-                    
-                    name = getattr(chat, 'username', getattr(chat, 'title', str(chat_id)))
-                    await self.process_message(text, chat_id, name, event)
+
+                name = self.channel_names[event.chat_id]
+                step_log.info("📩 MESAJ İŞLENİYOR (Link içeriyor): [%s] - %.50s...", name, text)
+                # Kuyrukta beklerken de checkpoint bu mesajı geçmez
+                self.checkpoints.begin(event.chat_id, event.id)
+                await self.queue.put(chat_id, text, chat_id, name, event.message, links)
+                step_log.debug("📬 Kuyruğa alındı (kuyruk derinliği: %d)", self.queue.depth)
             except Exception as e:
+                self.metrics.inc('handler_errors_total')
                 logger.error(f"❌ Handler hatası: {e}", exc_info=True)
 
+        self.queue.start()
+        if self.writer:
+            self.writer.start()
+        if self.metrics_server:
+            self._register_gauges()
+            try:
+                await self.metrics_server.start()
+            except OSError as e:
+                logger.warning(f"⚠️ Metrik sunucusu başlatılamadı: {e}")
+                self.metrics_server = None
+        # Catch-up canlı dinlemeyle paralel çalışır; bitene kadar iki taraf aynı mesajı tekrar almaz
+        catchup_task = None
+        if self.catchup_enabled:
+            catchup_task = asyncio.create_task(self._catch_up())
         logger.info("🚀 Bot kullanıcı hesabıyla çalışıyor!")
-        await self.client.run_until_disconnected()
+        try:
+            await self.client.run_until_disconnected()
+        finally:
+            if self.metrics_server:
+                await self.metrics_server.close()
+            if catchup_task is not None and not catchup_task.done():
+                catchup_task.cancel()
+                await asyncio.gather(catchup_task, return_exceptions=True)
+            await self.queue.stop()
+            if self.ai_batcher:
+                await self.ai_batcher.close()
+                logger.info(f"📊 Toplu AI: {self.ai_batcher.stats()}")
+            if self.writer:
+                await self.writer.close()
+                logger.info(f"📊 Firestore yazıcı: {self.writer.stats()}")
+            if self.outbox:
+                self.outbox.close()
+            logger.info(f"📊 HTTP: {self.fetcher.stats()} | Telegram hız sınırı: {self.telegram_bucket.stats()}")
+            logger.info(f"📊 Telegram medya: {self.media_fetcher.stats()}")
+            logger.info(f"📊 Host durumları: {self.fetcher.host_states()}")
+            await self.fetcher.close()
+            self.image_prep.close()
+            logger.info(
+                f"📊 Görsel ön işleme: {self.image_prep.stats()} | OCR çağrısı: {self.ocr_calls}, "
+                f"ortalama {self.ocr_seconds / self.ocr_calls if self.ocr_calls else 0:.2f}s"
+            )
+            if self.uploader:
+                await self.uploader.close()
+                logger.info(f"📊 imgbb: {self.uploader.stats()}")
+            self.link_cache.close()
+            self.checkpoints.close()
+            logger.info(f"📊 Mağaza çözücü: {self.store_resolver.stats()}")
+            logger.info(f"📊 Link cache: {self.link_cache.stats()}")
+            self.ai_cache.close()
+            logger.info(f"📊 AI cache: {self.ai_cache.stats()}")
+            if self.classifier:
+                logger.info(f"📊 Kural tabanlı kategori: {self.classifier.stats()} | atlanan AI çağrısı: {self.ai_calls_avoided}")
+            if self.dedup:
+                self.dedup.close()
+                logger.info(f"📊 Dedup: {self.dedup.stats()}")
 
-if __name__ == '__main__':
-    os.makedirs('logs', exist_ok=True)
+def main():
+    global db, model
+    # Logging yapılandırması - kayıtlar kuyruğa atılır, dosya/konsol yazımı ayrı thread'de yapılır.
+    # Modül import edildiğinde log dosyası oluşmasın diye burada yapılır
+    setup_logging(
+        os.getenv("LOG_FILE", "logs/bot.log"),
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        json_file=os.getenv("LOG_JSON", "1") == "1",
+        step_level=os.getenv("LOG_STEP_LEVEL", "INFO"),
+        step_sample=float(os.getenv("LOG_STEP_SAMPLE", "1.0")),
+    )
+    db = connect_firestore()
+    model = load_gemini_model()
     asyncio.run(TelegramDealBot().run())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,37 +1,5 @@
 # -*- coding: utf-8 -*-
-import re
-
-def parse_price(price_str):
-    if not price_str: return 0.0
-    price_str = str(price_str).strip()
-    price_str = re.sub(r'(?:₺|TL|lira|TRY)', '', price_str, flags=re.I).strip()
-    price_str = re.sub(r'[^\d.,]', '', price_str)
-    if not price_str: return 0.0
-    
-    # Türk formatı: 1.234,56
-    if ',' in price_str and '.' in price_str:
-        parts = price_str.rsplit(',', 1)
-        if len(parts) == 2 and len(parts[1]) <= 2:
-            price_str = price_str.replace('.', '').replace(',', '.')
-        else:
-            price_str = price_str.replace(',', '').replace('.', '')
-    elif ',' in price_str:
-        parts = price_str.rsplit(',', 1)
-        if len(parts) == 2 and len(parts[1]) <= 2:
-            price_str = price_str.replace(',', '.')
-        else:
-            price_str = price_str.replace(',', '')
-    elif '.' in price_str:
-        parts = price_str.rsplit('.', 1)
-        if len(parts) == 2 and len(parts[1]) <= 2:
-            pass
-        else:
-            price_str = price_str.replace('.', '')
-            
-    try:
-        return float(price_str)
-    except:
-        return 0.0
+from price_extractor import extract_price, find_price_candidates
 
 test_messages = [
     "🔥 Apple iPhone 15 Pro 128GB 64.999 TL!",
@@ -46,41 +14,16 @@ test_messages = [
     "Amazon'da 19,900 TL"
 ]
 
-regex_list = [
-    # 1. "Sadece X TL" / "Fiyat: X TL" (Güçlü niyet)
-    r'(?:sadece|fiyat|fiyatı|tutar|tutarı)\s*[:\s]\s*(\d+(?:[.,]\d+)*)\s*(?:TL|₺|TRY)',
-    
-    # 2. "X TL yerine Y TL" (İndirimli fiyatı al, Y)
-    r'(?:yerine|düşen)\s*(\d+(?:[.,]\d+)*)\s*(?:TL|₺|TRY)',
-    
-    # 3. Satır sonundaki fiyat (Genelde başlık + fiyat formatı)
-    r'(\d+(?:[.,]\d+)*)\s*(?:TL|₺|TRY)\s*$',
-    
-    # 4. Genel fiyat (X TL) - En riskli, sona sakla
-    r'(\d+(?:[.,]\d+)*)\s*(?:TL|₺|TRY)'
-]
-
 print("--- Test Başlıyor ---")
 for msg in test_messages:
-    found = False
     print(f"\nMesaj: {msg}")
     
-    # Önceki mantığı simüle et
-    # ...
+    # Tüm adayları konum ve öncelikleriyle göster
+    for candidate in find_price_candidates(msg):
+        print(f"  • {candidate.raw!r} -> {candidate.value} (öncelik {candidate.priority}, {candidate.kind}, konum {candidate.start})")
     
-    # Yeni mantık
-    for i, pattern in enumerate(regex_list):
-        matches = re.findall(pattern, msg, re.I | re.MULTILINE)
-        if matches:
-            # En son eşleşmeyi al (genelde "yerine" kalıbında sonuncusu indirimli fiyattır)
-            # Ama "yerine" regex'i zaten spesifik.
-            val = matches[-1] # Birden fazla varsa sonuncusu genelde asıl fiyattır (örn: 100 TL yerine 50 TL)
-            price = parse_price(val)
-            if price > 0:
-                print(f"  ✅ Bulundu (Regex #{i+1}): {price} TL")
-                found = True
-                break
-    
-    if not found:
+    price = extract_price(msg)
+    if price > 0:
+        print(f"  ✅ Bulundu: {price} TL")
+    else:
         print("  ❌ Bulunamadı")
-